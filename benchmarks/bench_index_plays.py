@@ -0,0 +1,47 @@
+"""Per-decision cost of index plays versus plain basic strategy
+
+Run from the repository root:  python benchmarks/bench_index_plays.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jack import BasicStrategy, CardCounter, CompiledStrategy, CountingStrategy, Hand, Rules, CARD_RANKS
+
+
+def decision_space():
+    """Every two-card hand against every upcard"""
+    return [(Hand([a, b]), dealer) for a in CARD_RANKS for b in CARD_RANKS for dealer in CARD_RANKS]
+
+
+def per_decision_ns(strategy, queries, repeat=15):
+    def run():
+        for hand, dealer in queries:
+            strategy.get_recommendation(hand, dealer)
+
+    best = min(timeit.repeat(run, number=20, repeat=repeat))
+    return best / (20 * len(queries)) * 1e9
+
+
+def main():
+    rules = Rules()
+    counter = CardCounter(rules.decks)
+    counter.running_count = 12  # enough to trigger positive-index plays
+    queries = decision_space()
+
+    strategies = [
+        ("BasicStrategy", BasicStrategy(rules)),
+        ("CompiledStrategy", CompiledStrategy(rules)),
+        ("CountingStrategy (Illustrious 18)", CountingStrategy(rules, counter)),
+    ]
+    baseline = None
+    for name, strategy in strategies:
+        ns = per_decision_ns(strategy, queries)
+        baseline = baseline or ns
+        print(f"{name:<36} {ns:8.1f} ns/decision  ({ns / baseline:.2f}x BasicStrategy)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from black_jack import BasicStrategy, BlackjackGame, Hand, Rules, CARD_RANKS
+
+
+@pytest.fixture
+def rules():
+    return Rules()
+
+
+@pytest.fixture
+def game(rules):
+    return BlackjackGame(rules, BasicStrategy(rules), rng=random.Random(1234), verbose=False)
+
+
+@pytest.fixture(scope="session")
+def decision_space():
+    """Every two- and three-card hand against every upcard"""
+    hands = [[a, b] for a in CARD_RANKS for b in CARD_RANKS]
+    hands += [cards + [c] for cards in hands for c in CARD_RANKS]
+    queries = []
+    for cards in hands:
+        hand = Hand(cards[:2])
+        for card in cards[2:]:
+            hand.add_card(card)
+        queries.extend((hand, dealer) for dealer in CARD_RANKS)
+    return queries
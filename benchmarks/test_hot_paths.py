@@ -0,0 +1,65 @@
+"""Benchmarks for the hot paths of black_jack.py
+
+Baselines are stored per platform under benchmarks/.benchmarks. Save one on
+the machine that runs the simulations, then fail any later run whose median
+regresses by more than 20%:
+
+    pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import pytest
+
+from black_jack import BasicStrategy, CompiledStrategy, Hand
+
+
+def test_hand_construction(benchmark):
+    benchmark(Hand, ['K', '6'], 10)
+
+
+def test_hand_add_card(benchmark):
+    def add_cards():
+        hand = Hand(['2', '3'])
+        hand.add_card('A')
+        hand.add_card('4')
+        hand.add_card('5')
+        return hand
+
+    assert benchmark(add_cards).value == 15
+
+
+@pytest.mark.parametrize("strategy_class", [BasicStrategy, CompiledStrategy])
+def test_get_recommendation_decision_space(benchmark, rules, decision_space, strategy_class):
+    strategy = strategy_class(rules)
+
+    def recommend_all():
+        for hand, dealer_card in decision_space:
+            strategy.get_recommendation(hand, dealer_card)
+
+    benchmark(recommend_all)
+
+
+def test_create_shoe(benchmark, game):
+    shoe = benchmark(game._create_shoe)
+    assert len(shoe) == 52 * game.rules.decks
+
+
+def test_shuffle(benchmark, game):
+    shoe = game.shoe
+    benchmark(game._shuffle)
+    assert game.shoe is shoe
+
+
+def test_draw_card(benchmark, game):
+    benchmark(game._draw_card)
+
+
+def test_dealer_play(benchmark, game):
+    def deal_dealer():
+        game.dealer_hand = Hand([game._draw_card(), game._draw_card()])
+        return (), {}
+
+    benchmark.pedantic(game._dealer_play, setup=deal_dealer, rounds=2000)
+
+
+def test_silent_round(benchmark, game):
+    benchmark(game.play_strategy_round, 10)
@@ -1,7 +1,19 @@
+# Only what `import black_jack` and a strategy lookup need is imported here.
+# Heavier subsystems (json, hashlib, csv, argparse, asyncio, multiprocessing,
+# concurrent.futures) are imported inside the functions that use them, so
+# short-lived advisor processes start fast; benchmarks/test_import_time.py
+# holds the import to a budget.
 import sys
 import random
+import math
 import os
+import struct
+from array import array
 from enum import Enum
+from functools import lru_cache
+from collections import defaultdict
+from itertools import islice, product
+from time import perf_counter_ns
 from typing import List, Dict, Tuple, Optional
 
 class Action(Enum):
@@ -9,22 +21,112 @@ class Action(Enum):
     STAND = "ST"
     DOUBLE = "D"
     SPLIT = "SP"
+    SURRENDER = "SU"
+
+# Card ranks in rank-code order: code i in a compact shoe is CARD_RANKS[i]
+CARD_RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+
+# Totals a two-card hand may double on, per Rules.double_on ('any' has no restriction)
+DOUBLE_ON_TOTALS = {'any': None, '9-11': frozenset((9, 10, 11)), '10-11': frozenset((10, 11))}
+SURRENDER_RULES = ('none', 'late', 'early')
 
 class Rules:
-    def __init__(self, dealer_hits_soft_17=False, double_after_split=True, decks=6):
+    # Shoe handling and payouts: these fields never change a playing decision
+    STRATEGY_NEUTRAL_FIELDS = ('penetration', 'continuous_shuffle', 'blackjack_pays', 'insurance')
+
+    def __init__(
+        self,
+        dealer_hits_soft_17=False,
+        double_after_split=True,
+        decks=6,
+        penetration=0.75,
+        continuous_shuffle=False,
+        blackjack_pays=1.5,
+        double_on='any',
+        surrender='none',
+        max_split_hands=4,
+        resplit_aces=False,
+        split_aces_one_card=True,
+        hit_split_aces=False,
+        double_split_aces=False,
+        insurance=True,
+    ):
+        if double_on not in DOUBLE_ON_TOTALS:
+            raise ValueError(f"double_on must be one of {', '.join(DOUBLE_ON_TOTALS)}")
+        if surrender not in SURRENDER_RULES:
+            raise ValueError(f"surrender must be one of {', '.join(SURRENDER_RULES)}")
         self.dealer_hits_soft_17 = dealer_hits_soft_17
         self.double_after_split = double_after_split
         self.decks = decks
+        # Fraction of the shoe dealt before the cut card comes out; a continuous
+        # shuffling machine (CSM) reshuffles every card before every round instead
+        self.penetration = penetration
+        self.continuous_shuffle = continuous_shuffle
+        self.blackjack_pays = blackjack_pays  # 1.5 for 3:2, 1.2 for 6:5
+        self.double_on = double_on
+        # Late surrender is offered after the dealer peeks for blackjack, early surrender before
+        self.surrender = surrender
+        self.max_split_hands = max_split_hands
+        self.resplit_aces = resplit_aces
+        self.split_aces_one_card = split_aces_one_card
+        self.hit_split_aces = hit_split_aces
+        self.double_split_aces = double_split_aces
+        # Insurance (even money on a blackjack) is offered when the dealer shows an ace
+        self.insurance = insurance
+
+    @property
+    def one_card_split_aces(self) -> bool:
+        """Split aces get one card each and cannot be hit"""
+        return self.split_aces_one_card and not self.hit_split_aces
+
+    @property
+    def may_double_split_aces(self) -> bool:
+        """Split aces may be doubled: doubling after a split is allowed, extends to aces, and they draw"""
+        return self.double_after_split and self.double_split_aces and not self.one_card_split_aces
+
+# Hard points per card, counting aces as 1
+CARD_POINTS = {card: min(i + 2, 10) for i, card in enumerate(CARD_RANKS)}
+CARD_POINTS['A'] = 1
+
+# Shoe composition index per card: 2-9 -> 0-7, ten-valued cards -> 8, ace -> 9
+VALUE_RANKS = ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'A')
+CARD_VALUE_INDEX = {card: VALUE_RANKS.index(card) if card in VALUE_RANKS else VALUE_RANKS.index('10') for card in CARD_RANKS}
 
 class Hand:
+    __slots__ = (
+        'cards', 'bet', 'hard_total', 'aces', 'value', 'is_soft', 'is_pair', 'is_blackjack', 'is_busted', 'stood',
+        'from_split', 'surrendered',
+    )
+
     def __init__(self, cards: List[str], bet: int = 0):
         self.cards = cards
         self.bet = bet
+        # Running hard total (aces as 1) and ace count, updated in O(1) per card
+        self.hard_total = 0
+        self.aces = 0
+        for card in cards:
+            self.hard_total += CARD_POINTS[card]
+            if card == 'A':
+                self.aces += 1
         self.value, self.is_soft = self._calculate_value()
         self.is_pair = len(cards) == 2 and self._pair_values_match(cards[0], cards[1])
         self.is_blackjack = len(cards) == 2 and self.value == 21
         self.is_busted = self.value > 21
         self.stood = False
+        self.from_split = False
+        self.surrendered = False
+
+    @classmethod
+    def split_from(cls, card: str, drawn: str, bet: int) -> 'Hand':
+        """One hand of a split pair; 21 on it is not a blackjack"""
+        hand = cls([card, drawn], bet)
+        hand.from_split = True
+        hand.is_blackjack = False
+        return hand
+
+    @property
+    def is_split_aces(self) -> bool:
+        return self.from_split and self.cards[0] == 'A'
 
     @staticmethod
     def _is_ten_value(card: str) -> bool:
@@ -41,31 +143,23 @@ class Hand:
         return Hand._pair_rank(a) == Hand._pair_rank(b)
 
     def _calculate_value(self) -> Tuple[int, bool]:
-        value = 0
-        aces = 0
-
-        for card in self.cards:
-            if card in ['J', 'Q', 'K', '10']:
-                value += 10
-            elif card == 'A':
-                aces += 1
-                value += 1  # Start with aces as 1
-            else:
-                value += int(card)
+        value = self.hard_total
 
         # Try to make one ace count as 11 if it doesn't bust
-        is_soft = False
-        if aces > 0 and value + 10 <= 21:
+        if self.aces and value <= 11:
             value += 10  # Convert one ace from 1 to 11
             # Hand is soft if:
             # 1. We have exactly one ace, OR
             # 2. We have multiple aces but the total is still low (like A,A = 12)
-            is_soft = (aces == 1) or (aces > 1 and value <= 12)
+            return value, self.aces == 1 or value <= 12
 
-        return value, is_soft
+        return value, False
 
     def add_card(self, card: str):
         self.cards.append(card)
+        self.hard_total += CARD_POINTS[card]
+        if card == 'A':
+            self.aces += 1
         self.value, self.is_soft = self._calculate_value()
         self.is_pair = False  # No longer a pair after adding a card
         self.is_blackjack = False  # No longer blackjack after adding a card
@@ -77,6 +171,10 @@ class Hand:
     def double_bet(self):
         self.bet *= 2
 
+    def surrender(self):
+        self.surrendered = True
+        self.stood = True
+
     def __str__(self):
         hand_type = ""
         if self.is_blackjack:
@@ -89,6 +187,8 @@ class Hand:
         status = ""
         if self.is_busted:
             status = "BUSTED"
+        elif self.surrendered:
+            status = "SURRENDERED"
         elif self.stood:
             status = "STAND"
 
@@ -97,19 +197,31 @@ class Hand:
 class BasicStrategy:
     def __init__(self, rules: Rules):
         self.rules = rules
+        # Rule flags read on every decision, resolved once here
+        self._surrender = rules.surrender != 'none'
+        self._early_surrender = rules.surrender == 'early'
+        self._double_totals = DOUBLE_ON_TOTALS[rules.double_on]
 
-    def get_recommendation(self, player_hand: Hand, dealer_card: str, ignore_pair: bool = False) -> Action:
+    def get_recommendation(
+        self, player_hand: Hand, dealer_card: str, ignore_pair: bool = False, ignore_surrender: bool = False, hands: int = 1
+    ) -> Action:
+        """The chart's action for the hand; hands (the hands in play) only matters to solver-backed strategies"""
         dealer_value = self._card_value(dealer_card)
         action: Action
 
         if not ignore_pair and player_hand.is_pair:
-            action = self._pair_strategy(self._pair_rank(player_hand.cards[0]), dealer_value)
+            hand_class, row = 'pair', self._pair_rank(player_hand.cards[0])
+            action = self._pair_strategy(row, dealer_value)
         elif player_hand.is_soft:
-            action = self._soft_strategy(player_hand.value, dealer_value)
+            hand_class, row = 'soft', player_hand.value
+            action = self._soft_strategy(row, dealer_value)
         else:
-            action = self._hard_strategy(player_hand.value, dealer_value)
+            hand_class, row = 'hard', player_hand.value
+            action = self._hard_strategy(row, dealer_value)
 
-        return self._apply_two_card_double_rule(action, len(player_hand.cards))
+        if not ignore_surrender and self.can_surrender(player_hand) and self._surrender_strategy(hand_class, row, dealer_value):
+            return Action.SURRENDER
+        return self._apply_double_rules(action, player_hand)
 
     def resolve_play_action(
         self,
@@ -118,22 +230,70 @@ class BasicStrategy:
         action: Action,
         can_double: bool = True,
         can_split: bool = True,
+        can_surrender: bool = True,
     ) -> Action:
         resolved = action
 
         if resolved == Action.SPLIT and not can_split:
-            resolved = self.get_recommendation(player_hand, dealer_card, ignore_pair=True)
+            resolved = self.get_recommendation(player_hand, dealer_card, ignore_pair=True, ignore_surrender=not can_surrender)
+
+        if resolved == Action.SURRENDER and not can_surrender:
+            resolved = self.get_recommendation(player_hand, dealer_card, ignore_pair=not can_split, ignore_surrender=True)
 
         if resolved == Action.DOUBLE and not can_double:
-            resolved = Action.HIT
+            resolved = self._double_fallback(player_hand.value, player_hand.is_soft)
 
         return resolved
 
-    def _apply_two_card_double_rule(self, action: Action, card_count: int) -> Action:
-        if card_count > 2 and action == Action.DOUBLE:
-            return Action.HIT
+    def can_surrender(self, player_hand: Hand) -> bool:
+        """Surrender is only offered on the first two cards of an unsplit hand"""
+        return self._surrender and len(player_hand.cards) == 2 and not player_hand.from_split
+
+    def take_insurance(self) -> bool:
+        # Insurance is a losing side bet without a count
+        return False
+
+    def _apply_double_rules(self, action: Action, player_hand: Hand) -> Action:
+        """Doubles are only allowed on two cards, and only on the totals the rules permit"""
+        if action == Action.DOUBLE and (len(player_hand.cards) > 2 or not self._may_double_on(player_hand.value)):
+            return self._double_fallback(player_hand.value, player_hand.is_soft)
         return action
 
+    def _may_double_on(self, hand_value: int) -> bool:
+        return self._double_totals is None or hand_value in self._double_totals
+
+    @staticmethod
+    def _double_fallback(hand_value: int, is_soft: bool) -> Action:
+        """What to do when a double is not allowed: stand on soft 18 and up, otherwise hit"""
+        return Action.STAND if is_soft and hand_value >= 18 else Action.HIT
+
+    def _surrender_strategy(self, hand_class: str, row, dealer_value: int) -> bool:
+        """Whether to surrender; row is the hand total, or the pair rank for pairs"""
+        if self._early_surrender:
+            # Early surrender gives up before the dealer checks for blackjack, so it pays against tens and aces
+            if dealer_value == 11:
+                if hand_class == 'pair':
+                    return row in ('3', '6', '7', '8')
+                return hand_class == 'hard' and (5 <= row <= 7 or 12 <= row <= 17)
+            if dealer_value == 10:
+                if hand_class == 'pair':
+                    return row in ('7', '8')
+                return hand_class == 'hard' and 14 <= row <= 16
+            return dealer_value == 9 and hand_class == 'hard' and row == 16
+
+        h17 = self.rules.dealer_hits_soft_17
+        if hand_class == 'pair':
+            return row == '8' and dealer_value == 11 and h17
+        if hand_class != 'hard':
+            return False
+        if row == 16:
+            return dealer_value >= 9
+        if row == 15:
+            return dealer_value == 10 or (dealer_value == 11 and h17)
+        if row == 17:
+            return dealer_value == 11 and h17
+        return False
+
     def _card_value(self, card: str) -> int:
         if card in ['J', 'Q', 'K', '10']:
             return 10
@@ -149,6 +309,7 @@ class BasicStrategy:
         return card
 
     def _pair_strategy(self, pair_card: str, dealer_value: int) -> Action:
+        das = self.rules.double_after_split
         if pair_card == 'A':
             return Action.SPLIT
         elif pair_card == '8':
@@ -159,7 +320,8 @@ class BasicStrategy:
             else:
                 return Action.SPLIT
         elif pair_card in ['2', '3']:
-            if dealer_value <= 7:
+            # Without double after split the small pairs give up the 2 and 3
+            if (dealer_value <= 7 if das else 4 <= dealer_value <= 7):
                 return Action.SPLIT
             else:
                 return Action.HIT
@@ -169,7 +331,7 @@ class BasicStrategy:
             else:
                 return Action.HIT
         elif pair_card == '6':
-            if dealer_value <= 6:
+            if (dealer_value <= 6 if das else 3 <= dealer_value <= 6):
                 return Action.SPLIT
             else:
                 return Action.HIT
@@ -179,7 +341,7 @@ class BasicStrategy:
             else:
                 return Action.HIT
         elif pair_card == '4':
-            if dealer_value in [5, 6]:
+            if das and dealer_value in [5, 6]:
                 return Action.SPLIT
             else:
                 return Action.HIT
@@ -255,6 +417,616 @@ class BasicStrategy:
         else:
             return Action.HIT
 
+def _rules_key(rules: Rules) -> tuple:
+    """Hashable snapshot of every Rules field that can change the strategy"""
+    return tuple(sorted(item for item in vars(rules).items() if item[0] not in Rules.STRATEGY_NEUTRAL_FIELDS))
+
+class CompiledStrategy(BasicStrategy):
+    """BasicStrategy answered from precomputed lookup tables
+
+    The pair/soft/hard branches are evaluated once per rule set for every
+    (row, dealer upcard) cell and flattened into tuples, so each decision is a
+    single index lookup. Tables are shared between instances with equal rules;
+    build a new strategy if a Rules object is changed after construction.
+    """
+
+    DEALER_INDEX = CARD_VALUE_INDEX
+    PAIR_ROW = {card: i for i, card in enumerate(['2', '3', '4', '5', '6', '7', '8', '9', '10', 'A'])}
+    PAIR_ROW.update({'J': PAIR_ROW['10'], 'Q': PAIR_ROW['10'], 'K': PAIR_ROW['10']})
+
+    DEALER_COLUMNS = 10
+    HARD_OFFSET = 0     # rows 0-31: hard totals
+    SOFT_OFFSET = 32    # rows 32-53: soft totals
+    PAIR_OFFSET = 54    # rows 54-63: pair ranks
+    ROWS = 64
+
+    _compiled_tables: Dict[tuple, Tuple[tuple, tuple, tuple]] = {}
+
+    def __init__(self, rules: Rules):
+        super().__init__(rules)
+        key = _rules_key(rules)
+        tables = self._compiled_tables.get(key)
+        if tables is None:
+            tables = self._compile()
+            self._compiled_tables[key] = tables
+        # Two-card hands that may surrender, two-card hands that may not (split or declined), three or more cards
+        self._double_table, self._no_surrender_table, self._no_double_table = tables
+
+    def _row_specs(self) -> List[Tuple[str, object, int, bool]]:
+        """(hand class, branch row, hand value, is soft) for every table row"""
+        specs: List[Tuple[str, object, int, bool]] = [None] * self.ROWS
+        for total in range(self.SOFT_OFFSET - self.HARD_OFFSET):
+            specs[self.HARD_OFFSET + total] = ('hard', total, total, False)
+        for total in range(self.PAIR_OFFSET - self.SOFT_OFFSET):
+            specs[self.SOFT_OFFSET + total] = ('soft', total, total, True)
+        for card, row in self.PAIR_ROW.items():
+            pair = Hand([card, card])
+            specs[self.PAIR_OFFSET + row] = ('pair', self._pair_rank(card), pair.value, pair.is_soft)
+        return specs
+
+    def _compile(self) -> Tuple[tuple, tuple, tuple]:
+        branches = {'hard': self._hard_strategy, 'soft': self._soft_strategy, 'pair': self._pair_strategy}
+        double_cells: List[Action] = []
+        no_surrender_cells: List[Action] = []
+        no_double_cells: List[Action] = []
+
+        for hand_class, row, value, is_soft in self._row_specs():
+            fallback = self._double_fallback(value, is_soft)
+            for dealer_value in range(2, 12):
+                action = branches[hand_class](row, dealer_value)
+                no_double_cells.append(fallback if action == Action.DOUBLE else action)
+                if action == Action.DOUBLE and not self._may_double_on(value):
+                    action = fallback
+                no_surrender_cells.append(action)
+                if self._surrender and self._surrender_strategy(hand_class, row, dealer_value):
+                    action = Action.SURRENDER
+                double_cells.append(action)
+
+        return tuple(double_cells), tuple(no_surrender_cells), tuple(no_double_cells)
+
+    @classmethod
+    def _row(cls, player_hand: Hand, allow_split: bool) -> int:
+        if allow_split and player_hand.is_pair:
+            return cls.PAIR_OFFSET + cls.PAIR_ROW[player_hand.cards[0]]
+        if player_hand.is_soft:
+            return cls.SOFT_OFFSET + player_hand.value
+        return cls.HARD_OFFSET + player_hand.value
+
+    def get_recommendation(
+        self, player_hand: Hand, dealer_card: str, ignore_pair: bool = False, ignore_surrender: bool = False, hands: int = 1
+    ) -> Action:
+        if len(player_hand.cards) > 2:
+            table = self._no_double_table
+        elif ignore_surrender or player_hand.from_split:
+            table = self._no_surrender_table
+        else:
+            table = self._double_table
+        return table[self._row(player_hand, not ignore_pair) * self.DEALER_COLUMNS + self.DEALER_INDEX[dealer_card]]
+
+    def verify(self) -> List[str]:
+        """Cross-check every table cell against the BasicStrategy branch logic
+
+        Walks all two- and three-card hands against every upcard, with and
+        without pair/double/split/surrender restrictions, and returns a description of
+        each mismatch (an empty list means the tables are exact).
+        """
+        reference = BasicStrategy(self.rules)
+        mismatches = []
+        hands = [[a, b] for a in CARD_RANKS for b in CARD_RANKS]
+        hands += [cards + [c] for cards in hands for c in CARD_RANKS]
+
+        for cards in hands:
+            hand = Hand(cards[:2])
+            for card in cards[2:]:
+                hand.add_card(card)
+            for dealer_card in CARD_RANKS:
+                for ignore_pair in (False, True):
+                    for ignore_surrender in (False, True):
+                        expected = reference.get_recommendation(hand, dealer_card, ignore_pair, ignore_surrender)
+                        actual = self.get_recommendation(hand, dealer_card, ignore_pair, ignore_surrender)
+                        if expected != actual:
+                            mismatches.append(
+                                f"{hand} vs {dealer_card} (ignore_pair={ignore_pair}, ignore_surrender={ignore_surrender}): {actual} != {expected}"
+                            )
+                for action in Action:
+                    for can_double in (False, True):
+                        for can_split in (False, True):
+                            for can_surrender in (False, True):
+                                expected = reference.resolve_play_action(hand, dealer_card, action, can_double, can_split, can_surrender)
+                                actual = self.resolve_play_action(hand, dealer_card, action, can_double, can_split, can_surrender)
+                                if expected != actual:
+                                    mismatches.append(
+                                        f"{hand} vs {dealer_card} {action} (double={can_double}, split={can_split}, "
+                                        f"surrender={can_surrender}): {actual} != {expected}"
+                                    )
+        return mismatches
+
+# Dealer final outcomes, in the order used by dealer_outcome_probabilities
+DEALER_OUTCOMES = ('17', '18', '19', '20', '21', 'bust', 'blackjack')
+DEALER_CACHE_SIZE = 1 << 18
+
+_VALUE_POINTS = tuple(CARD_POINTS[card] for card in VALUE_RANKS)
+_ACE_INDEX = VALUE_RANKS.index('A')
+
+def shoe_composition(decks: int, removed: Tuple[str, ...] = ()) -> Tuple[int, ...]:
+    """Card counts per VALUE_RANKS slot for a full shoe minus the removed cards
+
+    Raises ValueError when the cards need more of a rank than the shoe holds.
+    """
+    counts = [4 * decks] * len(VALUE_RANKS)
+    counts[CARD_VALUE_INDEX['10']] = 16 * decks
+    for card in removed:
+        counts[CARD_VALUE_INDEX[card]] -= 1
+    for rank, count in zip(VALUE_RANKS, counts):
+        if count < 0:
+            raise ValueError(f"More {rank!r} cards than a {decks}-deck shoe holds")
+    return tuple(counts)
+
+def composition_of(cards: List[str]) -> Tuple[int, ...]:
+    """Card counts per VALUE_RANKS slot for an explicit list of cards (e.g. the remaining shoe)"""
+    counts = [0] * len(VALUE_RANKS)
+    for card in cards:
+        counts[CARD_VALUE_INDEX[card]] += 1
+    return tuple(counts)
+
+@lru_cache(maxsize=DEALER_CACHE_SIZE)
+def _dealer_distribution(hard_total: int, aces: int, card_count: int, counts: Tuple[int, ...], hits_soft_17: bool) -> Tuple[float, ...]:
+    """Probability of each DEALER_OUTCOMES entry from a dealer state and the cards left to draw"""
+    # Mirrors Hand._calculate_value / BlackjackGame._dealer_play so exact and simulated results agree
+    value, is_soft = hard_total, False
+    if aces and hard_total <= 11:
+        value += 10
+        is_soft = aces == 1 or value <= 12
+
+    if card_count == 2 and value == 21:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+    if value > 21:
+        return (0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+    if card_count >= 2 and value >= 17 and not (value == 17 and is_soft and hits_soft_17):
+        outcome = [0.0] * len(DEALER_OUTCOMES)
+        outcome[value - 17] = 1.0
+        return tuple(outcome)
+
+    remaining = sum(counts)
+    result = [0.0] * len(DEALER_OUTCOMES)
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        weight = count / remaining
+        drawn = counts[:index] + (count - 1,) + counts[index + 1:]
+        branch = _dealer_distribution(
+            hard_total + _VALUE_POINTS[index],
+            aces + (index == _ACE_INDEX),
+            card_count + 1,
+            drawn,
+            hits_soft_17,
+        )
+        for outcome, probability in enumerate(branch):
+            result[outcome] += weight * probability
+    return tuple(result)
+
+def dealer_outcome_probabilities(upcard: str, composition: Tuple[int, ...], dealer_hits_soft_17: bool) -> Dict[str, float]:
+    """Exact distribution of the dealer's final hand given the upcard and remaining shoe
+
+    composition holds the remaining card counts per VALUE_RANKS slot (see
+    shoe_composition), excluding the upcard. Results are memoized on
+    (dealer state, composition) in a bounded LRU cache.
+    """
+    distribution = _dealer_distribution(
+        CARD_POINTS[upcard], int(upcard == 'A'), 1, tuple(composition), dealer_hits_soft_17
+    )
+    return dict(zip(DEALER_OUTCOMES, distribution))
+
+class StrategySolver:
+    """Composition-dependent expected values for hit, stand, double and split
+
+    Player draws are taken from the exact remaining cards and every player
+    state (hard total, aces, remaining composition) is evaluated once per
+    decision. The dealer distribution is computed from the composition at the
+    decision point (cards the player draws later are not removed from it),
+    which keeps a full chart to seconds. The dealer is assumed to have
+    peeked, so results are conditioned on no dealer blackjack (early
+    surrender is converted to that basis). Splits resplit up to the rules'
+    hand limit (see _split_ev) under the double-after-split and split-aces
+    rules, and doubles are only offered on the totals the rules allow.
+    """
+
+    def __init__(self, rules: Rules):
+        self.rules = rules
+        self._double_totals = DOUBLE_ON_TOTALS[rules.double_on]
+
+    def _may_double_on(self, hand_value: int) -> bool:
+        return self._double_totals is None or hand_value in self._double_totals
+
+    def _dealer(self, upcard: int, counts: Tuple[int, ...]) -> Tuple[float, ...]:
+        distribution = _dealer_distribution(
+            _VALUE_POINTS[upcard], int(upcard == _ACE_INDEX), 1, counts, self.rules.dealer_hits_soft_17
+        )
+        no_blackjack = 1.0 - distribution[-1]
+        return tuple(probability / no_blackjack for probability in distribution[:-1])
+
+    @staticmethod
+    def _stand_ev(value: int, dealer: Tuple[float, ...]) -> float:
+        if value > 21:
+            return -1.0
+        ev = dealer[-1]  # dealer busts
+        for dealer_value, probability in zip(range(17, 22), dealer):
+            if value > dealer_value:
+                ev += probability
+            elif value < dealer_value:
+                ev -= probability
+        return ev
+
+    @staticmethod
+    def _value(hard_total: int, aces: int) -> int:
+        return hard_total + 10 if aces and hard_total <= 11 else hard_total
+
+    @staticmethod
+    def _draws(counts: Tuple[int, ...]):
+        remaining = sum(counts)
+        for index, count in enumerate(counts):
+            if count:
+                yield index, count / remaining, counts[:index] + (count - 1,) + counts[index + 1:]
+
+    def _play(self, hard_total: int, aces: int, counts: Tuple[int, ...], dealer: Tuple[float, ...], memo: dict) -> Tuple[float, float, float]:
+        """(stand, hit, best of the two) EVs for a hand that may keep drawing"""
+        key = (hard_total, aces, counts)
+        cached = memo.get(key)
+        if cached is not None:
+            return cached
+
+        stand = self._stand_ev(self._value(hard_total, aces), dealer)
+        hit = 0.0
+        for index, weight, drawn in self._draws(counts):
+            new_total = hard_total + _VALUE_POINTS[index]
+            if new_total > 21:
+                hit -= weight
+            else:
+                hit += weight * self._play(new_total, aces + (index == _ACE_INDEX), drawn, dealer, memo)[2]
+
+        result = (stand, hit, max(stand, hit))
+        memo[key] = result
+        return result
+
+    def _double_ev(self, hard_total: int, aces: int, counts: Tuple[int, ...], dealer: Tuple[float, ...]) -> float:
+        ev = 0.0
+        for index, weight, _ in self._draws(counts):
+            value = self._value(hard_total + _VALUE_POINTS[index], aces + (index == _ACE_INDEX))
+            ev += weight * self._stand_ev(value, dealer)
+        return 2.0 * ev
+
+    def _split_hand_ev(self, card_index: int, index: int, counts: Tuple[int, ...], dealer: Tuple[float, ...], memo: dict) -> float:
+        """Best EV of a post-split hand of the split card plus card index, drawing from counts"""
+        rules = self.rules
+        is_ace = card_index == _ACE_INDEX
+        hard_total = _VALUE_POINTS[card_index] + _VALUE_POINTS[index]
+        aces = int(is_ace) + (index == _ACE_INDEX)
+        value = self._value(hard_total, aces)
+        if is_ace and rules.one_card_split_aces:
+            best = self._stand_ev(value, dealer)
+        else:
+            best = self._play(hard_total, aces, counts, dealer, memo)[2]
+        if (rules.may_double_split_aces if is_ace else rules.double_after_split) and self._may_double_on(value):
+            best = max(best, self._double_ev(hard_total, aces, counts, dealer))
+        return best
+
+    def _split_ev(self, card_index: int, counts: Tuple[int, ...], dealer: Tuple[float, ...], memo: dict, hands: int = 1) -> float:
+        """EV of splitting a pair when `hands` hands are already in play
+
+        Hands are dealt their second card in order, and one that draws the
+        split card again may be resplit while the table holds fewer than
+        max_split_hands hands. pending(k, n, counts) is the EV of the k hands
+        still holding just the split card, with n hands in play and counts
+        left in the shoe, memoized on that state for this pair and upcard.
+        Second-card and resplit draws come off the shoe exactly; each hand's
+        own play is valued against the shoe at the split minus its second card.
+        """
+        rules = self.rules
+        may_resplit = card_index != _ACE_INDEX or rules.resplit_aces
+        hand_evs = [0.0] * len(counts)
+        for index, _, drawn in self._draws(counts):
+            hand_evs[index] = self._split_hand_ev(card_index, index, drawn, dealer, memo)
+        states: Dict[tuple, float] = {}
+
+        def pending(k: int, n: int, counts: Tuple[int, ...]) -> float:
+            if not may_resplit or n >= rules.max_split_hands:
+                # No more resplits: every remaining hand's second card has the same distribution
+                remaining = sum(counts)
+                return k * sum(count * ev for count, ev in zip(counts, hand_evs)) / remaining
+            key = (k, n, counts)
+            cached = states.get(key)
+            if cached is not None:
+                return cached
+            ev = 0.0
+            for index, weight, drawn in self._draws(counts):
+                keep = hand_evs[index] + (pending(k - 1, n, drawn) if k > 1 else 0.0)
+                if index == card_index:
+                    keep = max(keep, pending(k + 1, n + 1, drawn))
+                ev += weight * keep
+            states[key] = ev
+            return ev
+
+        return pending(2, hands + 1, counts)
+
+    def _surrender_ev(self, upcard: int, counts: Tuple[int, ...]) -> float:
+        """Surrender's EV on the same no-dealer-blackjack basis as the other actions"""
+        if self.rules.surrender == 'late':
+            return -0.5
+        # Early surrender also saves half the bet when the dealer turns out to have blackjack
+        blackjack = _dealer_distribution(
+            _VALUE_POINTS[upcard], int(upcard == _ACE_INDEX), 1, counts, self.rules.dealer_hits_soft_17
+        )[-1]
+        return (blackjack - 0.5) / (1.0 - blackjack)
+
+    def evaluate(
+        self,
+        player_hand: Hand,
+        dealer_card: str,
+        composition: Optional[Tuple[int, ...]] = None,
+        ignore_pair: bool = False,
+        ignore_surrender: bool = False,
+        hands: int = 1,
+    ) -> Dict[Action, float]:
+        """EV per initial bet of every action available to the hand
+
+        composition is the remaining shoe per VALUE_RANKS slot; by default it is
+        a full shoe minus the player's cards and the dealer upcard. hands is
+        the number of hands in play, which limits resplits (a split hand
+        implies at least two).
+        """
+        if composition is None:
+            composition = shoe_composition(self.rules.decks, tuple(player_hand.cards) + (dealer_card,))
+        counts = tuple(composition)
+        dealer = self._dealer(CARD_VALUE_INDEX[dealer_card], counts)
+        memo: dict = {}
+
+        rules = self.rules
+        split_aces = player_hand.is_split_aces
+        stand, hit, _ = self._play(player_hand.hard_total, player_hand.aces, counts, dealer, memo)
+        evs = {Action.STAND: stand}
+        if not (split_aces and rules.one_card_split_aces):
+            evs[Action.HIT] = hit
+        if len(player_hand.cards) == 2:
+            may_double = not player_hand.from_split or (rules.may_double_split_aces if split_aces else rules.double_after_split)
+            if may_double and self._may_double_on(player_hand.value):
+                evs[Action.DOUBLE] = self._double_ev(player_hand.hard_total, player_hand.aces, counts, dealer)
+            if player_hand.from_split:
+                hands = max(hands, 2)
+            may_split = hands < rules.max_split_hands and (rules.resplit_aces or not split_aces)
+            if player_hand.is_pair and may_split and not ignore_pair:
+                evs[Action.SPLIT] = self._split_ev(CARD_VALUE_INDEX[player_hand.cards[0]], counts, dealer, memo, hands)
+            if self.rules.surrender != 'none' and not ignore_surrender and not player_hand.from_split:
+                evs[Action.SURRENDER] = self._surrender_ev(CARD_VALUE_INDEX[dealer_card], counts)
+        return evs
+
+    def best_action(
+        self,
+        player_hand: Hand,
+        dealer_card: str,
+        composition: Optional[Tuple[int, ...]] = None,
+        ignore_pair: bool = False,
+        ignore_surrender: bool = False,
+        hands: int = 1,
+    ) -> Tuple[Action, Dict[Action, float]]:
+        evs = self.evaluate(player_hand, dealer_card, composition, ignore_pair, ignore_surrender, hands)
+        return max(evs, key=evs.get), evs
+
+    def chart(self) -> Dict[str, Dict[int, List[Action]]]:
+        """Regenerate the full pair/soft/hard chart for the rules
+
+        Rows map a hand total (or pair card value, 11 for aces) to the best
+        action against each upcard in VALUE_RANKS order, using a
+        representative two-card hand for each total.
+        """
+        hard_hands = {total: ['10', str(total - 10)] if total >= 12 else [str(total - total // 2 + 1), str(total // 2 - 1)] for total in range(5, 21)}
+        hard_hands[5], hard_hands[6] = ['2', '3'], ['2', '4']
+        soft_hands = {total: ['A', str(total - 11)] for total in range(13, 21)}
+        pair_hands = {CARD_POINTS[card] if card != 'A' else 11: [card, card] for card in VALUE_RANKS}
+
+        chart: Dict[str, Dict[int, List[Action]]] = {'hard': {}, 'soft': {}, 'pair': {}}
+        for kind, hands in (('hard', hard_hands), ('soft', soft_hands), ('pair', pair_hands)):
+            for total, cards in hands.items():
+                chart[kind][total] = [
+                    self.best_action(Hand(list(cards)), dealer_card, ignore_pair=kind != 'pair')[0]
+                    for dealer_card in VALUE_RANKS
+                ]
+        return chart
+
+class ExactStrategy(BasicStrategy):
+    """BasicStrategy whose recommendations come from the composition-dependent solver
+
+    Set composition to the live remaining shoe to play exactly against it;
+    otherwise a full shoe minus the visible cards is assumed.
+    """
+
+    def __init__(self, rules: Rules, composition: Optional[Tuple[int, ...]] = None):
+        super().__init__(rules)
+        self.solver = StrategySolver(rules)
+        self.composition = composition
+
+    def get_recommendation(
+        self, player_hand: Hand, dealer_card: str, ignore_pair: bool = False, ignore_surrender: bool = False, hands: int = 1
+    ) -> Action:
+        if player_hand.is_busted:
+            return super().get_recommendation(player_hand, dealer_card, ignore_pair, ignore_surrender)
+        return self.solver.best_action(player_hand, dealer_card, self.composition, ignore_pair, ignore_surrender, hands)[0]
+
+# Solved strategy charts shipped next to this script, keyed by rules_hash()
+STRATEGY_TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_tables.json')
+_ACTION_CODES = {Action.HIT: 'H', Action.STAND: 'S', Action.DOUBLE: 'D', Action.SPLIT: 'P', Action.SURRENDER: 'R'}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+_strategy_tables: Optional[Dict[str, dict]] = None
+
+def rules_hash(rules: Rules) -> str:
+    """Stable short hash of the Rules fields that shape the strategy, used to key cached strategy tables"""
+    import hashlib
+    import json
+
+    payload = json.dumps(dict(_rules_key(rules)), sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+def encode_chart(chart: Dict[str, Dict[int, List[Action]]]) -> Dict[str, Dict[str, str]]:
+    """Compact form of a StrategySolver chart: one action letter per upcard"""
+    return {
+        kind: {str(total): ''.join(_ACTION_CODES[action] for action in row) for total, row in rows.items()}
+        for kind, rows in chart.items()
+    }
+
+def decode_chart(encoded: Dict[str, Dict[str, str]]) -> Dict[str, Dict[int, List[Action]]]:
+    return {
+        kind: {int(total): [_CODE_ACTIONS[code] for code in row] for total, row in rows.items()}
+        for kind, rows in encoded.items()
+    }
+
+def strategy_rule_variants(decks=range(1, 9)) -> List[Rules]:
+    """Every rule set the build step solves: decks x H17/S17 x DAS on/off x late surrender on/off"""
+    return [
+        Rules(dealer_hits_soft_17=h17, double_after_split=das, decks=deck_count, surrender=surrender)
+        for deck_count in decks
+        for h17 in (False, True)
+        for das in (False, True)
+        for surrender in ('none', 'late')
+    ]
+
+def _solve_chart(rules: Rules) -> Tuple[str, dict]:
+    return rules_hash(rules), {'rules': dict(_rules_key(rules)), 'chart': encode_chart(StrategySolver(rules).chart())}
+
+def build_strategy_tables(path: str = STRATEGY_TABLES_PATH, variants: Optional[List[Rules]] = None, workers: Optional[int] = None) -> Dict[str, dict]:
+    """Solve the chart for every rule variant across a process pool and write them to path"""
+    import json
+    from concurrent.futures import ProcessPoolExecutor
+
+    variants = variants if variants is not None else strategy_rule_variants()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tables = dict(pool.map(_solve_chart, variants))
+
+    with open(path, 'w') as f:
+        json.dump(tables, f, sort_keys=True, separators=(',', ':'))
+
+    global _strategy_tables
+    _strategy_tables = None
+    return tables
+
+def load_strategy_tables(path: str = STRATEGY_TABLES_PATH) -> Dict[str, dict]:
+    """Read the solved tables once, on first use; an absent file yields no tables"""
+    global _strategy_tables
+    if _strategy_tables is None:
+        import json
+
+        try:
+            with open(path) as f:
+                _strategy_tables = json.load(f)
+        except FileNotFoundError:
+            _strategy_tables = {}
+    return _strategy_tables
+
+class SolvedStrategy(CompiledStrategy):
+    """CompiledStrategy whose tables hold the solver's optimal chart for the rules
+
+    The chart is read from the prebuilt strategy_tables.json (see
+    build_strategy_tables); rule sets missing from the file are solved on
+    first use. Cells the chart does not cover (busted, 21, single-card
+    totals) keep the BasicStrategy actions.
+    """
+
+    _compiled_tables: Dict[tuple, Tuple[tuple, tuple, tuple]] = {}
+
+    def _compile(self) -> Tuple[tuple, tuple, tuple]:
+        double_table, no_surrender_table, _ = super()._compile()
+        cells = list(double_table)
+        no_surrender_cells = list(no_surrender_table)
+
+        entry = load_strategy_tables().get(rules_hash(self.rules))
+        chart = decode_chart(entry['chart']) if entry else StrategySolver(self.rules).chart()
+        offsets = {'hard': self.HARD_OFFSET, 'soft': self.SOFT_OFFSET}
+        for kind, rows in chart.items():
+            for total, row in rows.items():
+                index = self.PAIR_OFFSET + self.PAIR_ROW[VALUE_RANKS[total - 2]] if kind == 'pair' else offsets[kind] + total
+                start = index * self.DEALER_COLUMNS
+                cells[start:start + self.DEALER_COLUMNS] = row
+                # Where the chart surrenders, a hand that cannot keeps the BasicStrategy action
+                for column, action in enumerate(row):
+                    if action != Action.SURRENDER:
+                        no_surrender_cells[start + column] = action
+
+        no_double_cells = []
+        for row, (_, _, value, is_soft) in enumerate(self._row_specs()):
+            fallback = self._double_fallback(value, is_soft)
+            start = row * self.DEALER_COLUMNS
+            for action in no_surrender_cells[start:start + self.DEALER_COLUMNS]:
+                no_double_cells.append(fallback if action == Action.DOUBLE else action)
+        return tuple(cells), tuple(no_surrender_cells), tuple(no_double_cells)
+
+class BatchAdvisor:
+    """Recommendations and EVs for many (player cards, upcard) queries per call
+
+    One strategy and one solver serve every query. Within a call, repeated
+    queries are answered once: recommendations are keyed on the exact cards,
+    EVs on the card values, which is all the solver depends on.
+    """
+
+    def __init__(self, rules: Optional[Rules] = None, strategy: Optional[BasicStrategy] = None):
+        self.rules = rules if rules is not None else Rules()
+        self.strategy = strategy if strategy is not None else CompiledStrategy(self.rules)
+        self.solver = StrategySolver(self.rules)
+
+    @staticmethod
+    def _check(player_cards: List[List[str]], upcards: List[str], decks: int):
+        if len(player_cards) != len(upcards):
+            raise ValueError(f"Got {len(player_cards)} hands but {len(upcards)} dealer upcards")
+        for i, (cards, upcard) in enumerate(zip(player_cards, upcards)):
+            for card in (*cards, upcard):
+                if card not in CARD_VALUE_INDEX:
+                    raise ValueError(f"Invalid card {card!r} in query {i}")
+            if not cards:
+                raise ValueError(f"Query {i} has no player cards")
+            try:
+                shoe_composition(decks, (*cards, upcard))
+            except ValueError as error:
+                raise ValueError(f"Query {i}: {error}") from None
+
+    def recommend(self, player_cards: List[List[str]], upcards: List[str]) -> List[Action]:
+        self._check(player_cards, upcards, self.rules.decks)
+        get_recommendation = self.strategy.get_recommendation
+        answers: Dict[tuple, Action] = {}
+        actions = []
+        for cards, upcard in zip(player_cards, upcards):
+            key = (tuple(cards), upcard)
+            action = answers.get(key)
+            if action is None:
+                action = answers[key] = get_recommendation(Hand(list(cards)), upcard)
+            actions.append(action)
+        return actions
+
+    def evaluate(self, player_cards: List[List[str]], upcards: List[str]) -> List[Dict[Action, float]]:
+        """EV per initial bet of every available action, against a full shoe minus the visible cards"""
+        self._check(player_cards, upcards, self.rules.decks)
+        answers: Dict[tuple, Dict[Action, float]] = {}
+        evs = []
+        for cards, upcard in zip(player_cards, upcards):
+            key = (tuple(sorted(CARD_VALUE_INDEX[card] for card in cards)), CARD_VALUE_INDEX[upcard])
+            result = answers.get(key)
+            if result is None:
+                result = answers[key] = self.solver.evaluate(Hand(list(cards)), upcard)
+            evs.append(result)
+        return evs
+
+    def advise(
+        self, player_cards: List[List[str]], upcards: List[str], with_evs: bool = False
+    ) -> Tuple[List[Action], Optional[List[Dict[Action, float]]]]:
+        """Recommended actions, plus the per-action EVs when with_evs is set"""
+        actions = self.recommend(player_cards, upcards)
+        return actions, self.evaluate(player_cards, upcards) if with_evs else None
+
+_default_advisor: Optional[BatchAdvisor] = None
+
+def default_advisor() -> BatchAdvisor:
+    """Shared advisor for the standard rules, built on first use"""
+    global _default_advisor
+    if _default_advisor is None:
+        _default_advisor = BatchAdvisor()
+    return _default_advisor
+
 class GameStats:
     def __init__(self):
         self.total_hands = 0
@@ -290,63 +1062,720 @@ class GameStats:
 
 
 
+def _expand_tags(tags: Dict[str, int]) -> Dict[str, int]:
+    """Copy the ten's tag to J, Q and K"""
+    expanded = dict(tags)
+    for face in ('J', 'Q', 'K'):
+        expanded[face] = tags['10']
+    return expanded
+
+# Card tags per counting system (ten-valued cards share the '10' tag)
+COUNTING_SYSTEMS = {
+    'hi-lo': _expand_tags({'2': 1, '3': 1, '4': 1, '5': 1, '6': 1, '7': 0, '8': 0, '9': 0, '10': -1, 'A': -1}),
+    'ko': _expand_tags({'2': 1, '3': 1, '4': 1, '5': 1, '6': 1, '7': 1, '8': 0, '9': 0, '10': -1, 'A': -1}),
+    'hi-opt-i': _expand_tags({'2': 0, '3': 1, '4': 1, '5': 1, '6': 1, '7': 0, '8': 0, '9': 0, '10': -1, 'A': 0}),
+    'hi-opt-ii': _expand_tags({'2': 1, '3': 1, '4': 2, '5': 2, '6': 1, '7': 1, '8': 0, '9': 0, '10': -2, 'A': 0}),
+    'omega-ii': _expand_tags({'2': 1, '3': 1, '4': 2, '5': 2, '6': 2, '7': 1, '8': 0, '9': -1, '10': -2, 'A': 0}),
+    'zen': _expand_tags({'2': 1, '3': 1, '4': 2, '5': 2, '6': 2, '7': 1, '8': 0, '9': 0, '10': -2, 'A': -1}),
+}
+
+class CardCounter:
+    """Running count over the cards seen since the last shuffle
+
+    system is a COUNTING_SYSTEMS name or a custom card -> tag dict. Each
+    card seen costs one dict lookup and two additions.
+    """
+
+    __slots__ = ('tags', 'decks', 'running_count', 'cards_seen')
+
+    def __init__(self, decks: int, system='hi-lo'):
+        self.tags = COUNTING_SYSTEMS[system] if isinstance(system, str) else _expand_tags(system)
+        self.decks = decks
+        self.running_count = 0
+        self.cards_seen = 0
+
+    def count(self, card: str):
+        self.running_count += self.tags[card]
+        self.cards_seen += 1
+
+    def reset(self):
+        self.running_count = 0
+        self.cards_seen = 0
+
+    @property
+    def decks_remaining(self) -> float:
+        # Never divide by less than half a deck
+        return max((self.decks * 52 - self.cards_seen) / 52, 0.5)
+
+    @property
+    def true_count(self) -> float:
+        return self.running_count / self.decks_remaining
+
+    def __str__(self):
+        return f"RC {self.running_count:+d} | TC {self.true_count:+.1f}"
+
+class BetRamp:
+    """Bet sizing from the true count: units of the base bet per floored true count
+
+    ramp maps a minimum true count to the units bet at or above it; counts
+    below the lowest key bet one unit. Units are precomputed per integer true
+    count so each lookup is a clamp and an index.
+    """
+
+    def __init__(self, ramp: Optional[Dict[int, int]] = None, max_units: Optional[int] = None):
+        self.ramp = dict(ramp) if ramp is not None else {2: 2, 3: 3, 4: 4}
+        self.min_count = min(self.ramp)
+        self.max_count = max(self.ramp)
+        units = []
+        current = 1
+        for true_count in range(self.min_count, self.max_count + 1):
+            current = self.ramp.get(true_count, current)
+            units.append(min(current, max_units) if max_units else current)
+        self._units = units
+
+    def units(self, true_count: float) -> int:
+        index = int(true_count // 1)
+        if index < self.min_count:
+            return 1
+        return self._units[min(index, self.max_count) - self.min_count]
+
+    def bet(self, true_count: float, base_bet: int) -> int:
+        return base_bet * self.units(true_count)
+
+# Index plays: (hand class, total or pair card, dealer card, true count index, action at/above index, action below index)
+# None means the basic strategy action stands on that side of the index.
+ILLUSTRIOUS_18 = [
+    ('hard', 16, '10', 0, Action.STAND, None),
+    ('hard', 15, '10', 4, Action.STAND, None),
+    ('pair', '10', '5', 5, Action.SPLIT, None),
+    ('pair', '10', '6', 4, Action.SPLIT, None),
+    ('hard', 10, '10', 4, Action.DOUBLE, None),
+    ('hard', 12, '3', 2, Action.STAND, None),
+    ('hard', 12, '2', 3, Action.STAND, None),
+    ('hard', 11, 'A', 1, Action.DOUBLE, None),
+    ('hard', 9, '2', 1, Action.DOUBLE, None),
+    ('hard', 10, 'A', 4, Action.DOUBLE, None),
+    ('hard', 9, '7', 3, Action.DOUBLE, None),
+    ('hard', 16, '9', 5, Action.STAND, None),
+    ('hard', 13, '2', -1, Action.STAND, Action.HIT),
+    ('hard', 12, '4', 0, Action.STAND, Action.HIT),
+    ('hard', 12, '5', -2, Action.STAND, Action.HIT),
+    ('hard', 12, '6', -1, Action.STAND, Action.HIT),
+    ('hard', 13, '3', -2, Action.STAND, Action.HIT),
+]
+INSURANCE_INDEX = 3  # the remaining Illustrious 18 play: take insurance at TC >= +3
+
+# The Fab 4 late surrender indices: surrender at or above the index, play the hand out below it
+FAB_4 = [
+    ('hard', 14, '10', 3, Action.SURRENDER, None),
+    ('hard', 15, '10', 0, Action.SURRENDER, None),
+    ('hard', 15, '9', 2, Action.SURRENDER, None),
+    ('hard', 15, 'A', 1, Action.SURRENDER, None),
+]
+
+class IndexPlays:
+    """Count-based deviations from basic strategy, looked up in O(1)
+
+    Entries are laid out in the same (row, upcard) cells as CompiledStrategy,
+    so a lookup is one index into a flat list. Surrender entries (such as
+    FAB_4) are kept apart, since surrendering is decided before the hand is
+    played and only when the rules and the hand allow it. They are late
+    surrender indices, so CountingStrategy ignores them under early surrender.
+    """
+
+    def __init__(self, plays=ILLUSTRIOUS_18 + FAB_4, insurance_index: Optional[float] = INSURANCE_INDEX):
+        self.plays = list(plays)
+        self.insurance_index = insurance_index
+        cells = CompiledStrategy.ROWS * CompiledStrategy.DEALER_COLUMNS
+        self._cells: List[Optional[tuple]] = [None] * cells
+        self._surrender_cells: List[Optional[float]] = [None] * cells
+        for hand_class, total, dealer_card, index, above, below in self.plays:
+            if hand_class == 'pair':
+                row = CompiledStrategy.PAIR_OFFSET + CompiledStrategy.PAIR_ROW[total]
+            elif hand_class == 'soft':
+                row = CompiledStrategy.SOFT_OFFSET + total
+            else:
+                row = CompiledStrategy.HARD_OFFSET + total
+            cell = row * CompiledStrategy.DEALER_COLUMNS + CARD_VALUE_INDEX[dealer_card]
+            if above == Action.SURRENDER:
+                self._surrender_cells[cell] = index
+            else:
+                self._cells[cell] = (index, above, below)
+
+    def _cell(self, player_hand: Hand, dealer_card: str, ignore_pair: bool) -> Optional[tuple]:
+        return self._cells[
+            CompiledStrategy._row(player_hand, not ignore_pair) * CompiledStrategy.DEALER_COLUMNS + CARD_VALUE_INDEX[dealer_card]
+        ]
+
+    def _surrender_cell(self, player_hand: Hand, dealer_card: str, ignore_pair: bool) -> Optional[float]:
+        return self._surrender_cells[
+            CompiledStrategy._row(player_hand, not ignore_pair) * CompiledStrategy.DEALER_COLUMNS + CARD_VALUE_INDEX[dealer_card]
+        ]
+
+    @staticmethod
+    def _resolve(cell: tuple, player_hand: Hand, true_count: float) -> Optional[Action]:
+        action = cell[1] if true_count >= cell[0] else cell[2]
+        if action == Action.DOUBLE and len(player_hand.cards) > 2:
+            return Action.HIT
+        return action
+
+    def deviation(self, player_hand: Hand, dealer_card: str, true_count: float, ignore_pair: bool = False) -> Optional[Action]:
+        """The index play's action for this hand and count, or None when basic strategy applies"""
+        cell = self._cell(player_hand, dealer_card, ignore_pair)
+        return None if cell is None else self._resolve(cell, player_hand, true_count)
+
+    def surrenders(self, player_hand: Hand, dealer_card: str, true_count: float, ignore_pair: bool = False) -> Optional[bool]:
+        """Whether a surrender index says to surrender, or None when no index covers the hand"""
+        index = self._surrender_cell(player_hand, dealer_card, ignore_pair)
+        return None if index is None else true_count >= index
+
+    def take_insurance(self, true_count: float) -> bool:
+        return self.insurance_index is not None and true_count >= self.insurance_index
+
+class CountingStrategy(BasicStrategy):
+    """A base strategy with index plays applied from a live CardCounter's true count"""
+
+    def __init__(self, rules: Rules, counter: CardCounter, index_plays: Optional[IndexPlays] = None, base: Optional[BasicStrategy] = None):
+        super().__init__(rules)
+        self.counter = counter
+        self.index_plays = index_plays if index_plays is not None else IndexPlays()
+        self.base = base if base is not None else CompiledStrategy(rules)
+        # The surrender indices are for late surrender; early surrender keeps the base chart
+        self._surrender_indices = rules.surrender == 'late'
+
+    def get_recommendation(
+        self, player_hand: Hand, dealer_card: str, ignore_pair: bool = False, ignore_surrender: bool = False, hands: int = 1
+    ) -> Action:
+        # Surrender is settled first: a surrender index overrides the base strategy's choice
+        if not ignore_surrender and self.can_surrender(player_hand):
+            index = self.index_plays._surrender_cell(player_hand, dealer_card, ignore_pair) if self._surrender_indices else None
+            if index is None:
+                if self.base.get_recommendation(player_hand, dealer_card, ignore_pair, hands=hands) == Action.SURRENDER:
+                    return Action.SURRENDER
+            elif self.counter.true_count >= index:
+                return Action.SURRENDER
+
+        # The true count is only computed for the few cells that carry an index play
+        cell = self.index_plays._cell(player_hand, dealer_card, ignore_pair)
+        if cell is not None:
+            deviation = self.index_plays._resolve(cell, player_hand, self.counter.true_count)
+            if deviation is not None:
+                return deviation
+        return self.base.get_recommendation(player_hand, dealer_card, ignore_pair, ignore_surrender=True, hands=hands)
+
+    def take_insurance(self) -> bool:
+        return self.index_plays.take_insurance(self.counter.true_count)
+
+class GameProfiler:
+    """Per-phase call counts and nanosecond timings for a BlackjackGame
+
+    Attached with BlackjackGame.enable_profiling(), which wraps the phase
+    methods on that one game (and its strategy) only, so a game that is not
+    profiled runs the original methods with no overhead at all.
+    """
+
+    # Phase name -> BlackjackGame method it times
+    PHASES = {
+        'shuffle': '_shuffle',
+        'draw': '_draw_card',
+        'dealer_play': '_dealer_play',
+        'determine_winner': '_determine_winner',
+    }
+    STRATEGY_PHASE = 'strategy_lookup'
+
+    def __init__(self):
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.total_ns: Dict[str, int] = defaultdict(int)
+        self.self_ns: Dict[str, int] = defaultdict(int)
+        self.stacks: Dict[str, int] = defaultdict(int)  # collapsed call stack -> self time (ns)
+        self.callers: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0, 0])  # (caller, phase) -> [calls, self ns, total ns]
+        self._frames: List[list] = []
+
+    def wrap(self, phase: str, func):
+        frames = self._frames
+
+        def timed(*args, **kwargs):
+            frame = [phase, 0]  # phase, time spent in nested phases
+            frames.append(frame)
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                frames.pop()
+                own = elapsed - frame[1]
+                caller = frames[-1][0] if frames else 'round'
+                if frames:
+                    frames[-1][1] += elapsed
+                self.calls[phase] += 1
+                self.total_ns[phase] += elapsed
+                self.self_ns[phase] += own
+                self.stacks[';'.join(['round'] + [f[0] for f in frames] + [phase])] += own
+                edge = self.callers[(caller, phase)]
+                edge[0] += 1
+                edge[1] += own
+                edge[2] += elapsed
+
+        return timed
+
+    def report(self) -> str:
+        lines = [f"{'phase':<18}{'calls':>12}{'total ms':>12}{'self ms':>12}{'ns/call':>10}"]
+        for phase in sorted(self.total_ns, key=self.total_ns.get, reverse=True):
+            calls = self.calls[phase]
+            lines.append(
+                f"{phase:<18}{calls:>12}{self.total_ns[phase] / 1e6:>12.1f}{self.self_ns[phase] / 1e6:>12.1f}{self.total_ns[phase] // max(calls, 1):>10}"
+            )
+        return "\n".join(lines)
+
+    def write_collapsed(self, path: str):
+        """Write collapsed stacks ("round;dealer_play;draw <ns>") for flamegraph.pl / speedscope"""
+        with open(path, 'w') as f:
+            for stack, ns in sorted(self.stacks.items()):
+                f.write(f"{stack} {ns}\n")
+
+    def dump_stats(self, path: str):
+        """Write the timings in the marshal format read by pstats.Stats(path)"""
+        import marshal
+
+        def key(phase):
+            return ('black_jack.py', 0, phase)
+
+        stats = {}
+        for phase, calls in self.calls.items():
+            callers = {
+                key(caller): (edge[0], edge[0], edge[1] / 1e9, edge[2] / 1e9)
+                for (caller, callee), edge in self.callers.items()
+                if callee == phase
+            }
+            stats[key(phase)] = (calls, calls, self.self_ns[phase] / 1e9, self.total_ns[phase] / 1e9, callers)
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+def format_money(amount: float) -> str:
+    """An amount in rand, with cents only when it has them (R15, R7.50)"""
+    return f"R{amount:.0f}" if amount == int(amount) else f"R{amount:.2f}"
+
+class GameEvents:
+    """Observer for the structured events a BlackjackGame emits
+
+    Every handler is a no-op, so an instance of this class is the null sink
+    used for headless play; subclass and override the events you need.
+    on_draw is only called when a subclass overrides it.
+    """
+
+    def on_reshuffle(self):
+        pass
+
+    def on_draw(self, card: str, visible: bool):
+        pass
+
+    def on_deal(self, player_hands: List[Hand], dealer_hand: Hand):
+        pass
+
+    def on_action(self, hand_index: int, action: Action, hand: Hand):
+        pass
+
+    def on_rejected(self, hand_index: int, action: Action, reason: str):
+        pass
+
+    def on_split(self, hand_index: int, pair: Tuple[str, str], first: Hand, second: Hand, second_index: int):
+        pass
+
+    def on_bust(self, hand_index: int, hand: Hand, doubled: bool):
+        pass
+
+    def on_dealer_done(self, dealer_hand: Hand):
+        pass
+
+    def on_settle(self, hand_index: int, hand: Hand, result: float):
+        pass
+
+    def on_insurance(self, bet: float, result: float):
+        pass
+
+class ConsoleEvents(GameEvents):
+    """Renders game events as the console messages of the interactive modes"""
+
+    def on_reshuffle(self):
+        print("Reshuffling the shoe...")
+
+    def on_action(self, hand_index: int, action: Action, hand: Hand):
+        if action == Action.HIT:
+            print(f"You draw: {hand.cards[-1]}")
+            print(f"Your hand: {hand}")
+        elif action == Action.STAND:
+            print(f"You stand with: {hand}")
+        elif action == Action.DOUBLE:
+            print(f"You double and draw: {hand.cards[-1]}")
+            print(f"Your hand: {hand}")
+        elif action == Action.SURRENDER:
+            print(f"You surrender with: {hand}")
+
+    def on_rejected(self, hand_index: int, action: Action, reason: str):
+        print(reason)
+
+    def on_split(self, hand_index: int, pair: Tuple[str, str], first: Hand, second: Hand, second_index: int):
+        print(f"💫 SPLIT SUCCESSFUL! Original pair {pair[0]},{pair[1]} split into two hands:")
+        print(f"   Hand {hand_index + 1}: {first}")
+        print(f"   Hand {second_index + 1}: {second}")
+        print(f"   Each hand maintains the original bet of R{first.bet}")
+        print(f"   Cards drawn: {first.cards[1]} and {second.cards[1]}")
+
+    def on_bust(self, hand_index: int, hand: Hand, doubled: bool):
+        print("BUST! This doubled hand is complete." if doubled else "BUST! This hand is complete.")
+
+    def on_dealer_done(self, dealer_hand: Hand):
+        print(f"Dealer's hand: {dealer_hand}")
+        if dealer_hand.is_busted:
+            print("Dealer busted!")
+
+    def on_settle(self, hand_index: int, hand: Hand, result: float):
+        if result > 0:
+            print(f"Hand {hand_index + 1} wins {format_money(result)}!")
+        elif result < 0:
+            print(f"Hand {hand_index + 1} loses {format_money(-result)}!")
+        else:
+            print(f"Hand {hand_index + 1} pushes!")
+
+    def on_insurance(self, bet: float, result: float):
+        if result > 0:
+            print(f"Insurance pays {format_money(result)}!")
+        else:
+            print(f"Insurance loses {format_money(bet)}.")
+
+# Hand history chunk header: magic, rounds, hands, player cards, dealer cards, actions
+_HISTORY_MAGIC = b'BJH2'  # BJH2: results are float64, so half and 6:5 payouts are exact
+_HISTORY_HEADER = struct.Struct('<4sIIIII')
+_HISTORY_INDEX_ENTRY = struct.Struct('<QI')  # chunk file offset, rounds in chunk
+_RANK_CODES = {card: code for code, card in enumerate(CARD_RANKS)}
+_ACTION_LIST = list(Action)
+_ACTION_INDEX = {action: code for code, action in enumerate(_ACTION_LIST)}
+
+def _column(typecode: str, values=()) -> array:
+    return array(typecode, values)
+
+def _column_bytes(column: array) -> bytes:
+    if sys.byteorder == 'big' and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def _read_column(typecode: str, data: bytes, offset: int, count: int) -> Tuple[array, int]:
+    column = array(typecode)
+    end = offset + count * column.itemsize
+    column.frombytes(data[offset:end])
+    if sys.byteorder == 'big' and column.itemsize > 1:
+        column.byteswap()
+    return column, end
+
+class HandHistoryWriter(GameEvents):
+    """Streams every round of a game into an append-only columnar file
+
+    Use it as the game's event sink. Rounds are buffered as packed columns
+    (int8 rank and action codes, int32 bets, float64 results, uint32 offsets) and
+    written as one chunk every chunk_rounds rounds, so memory stays bounded.
+    Each chunk's file offset is appended to path + '.idx'.
+    """
+
+    def __init__(self, path: str, chunk_rounds: int = 65536):
+        self.path = path
+        self.chunk_rounds = chunk_rounds
+        self._data = open(path, 'ab')
+        self._index = open(path + '.idx', 'ab')
+        self._round: Optional[dict] = None
+        self._reset_columns()
+
+    def _reset_columns(self):
+        self.rounds = 0
+        self.round_bet = _column('i')
+        self.round_result = _column('d')
+        self.round_hands = _column('I', [0])
+        self.round_dealer = _column('I', [0])
+        self.round_actions = _column('I', [0])
+        self.hand_cards = _column('I', [0])
+        self.hand_bet = _column('i')
+        self.hand_result = _column('d')
+        self.player_cards = _column('b')
+        self.dealer_cards = _column('b')
+        self.action_hand = _column('B')
+        self.action_code = _column('b')
+
+    def on_deal(self, player_hands: List[Hand], dealer_hand: Hand):
+        self._end_round()
+        self._round = {'bet': player_hands[0].bet, 'result': 0, 'hands': [], 'dealer': dealer_hand, 'actions': []}
+
+    def on_action(self, hand_index: int, action: Action, hand: Hand):
+        self._round['actions'].append((hand_index, action))
+
+    def on_split(self, hand_index: int, pair: Tuple[str, str], first: Hand, second: Hand, second_index: int):
+        self._round['actions'].append((hand_index, Action.SPLIT))
+
+    def on_settle(self, hand_index: int, hand: Hand, result: float):
+        self._round['hands'].append((hand, result))
+        self._round['result'] += result
+
+    def on_insurance(self, bet: float, result: float):
+        self._round['result'] += result
+
+    def _end_round(self):
+        current, self._round = self._round, None
+        if current is None or not current['hands']:
+            return
+
+        self.round_bet.append(current['bet'])
+        self.round_result.append(current['result'])
+        for hand, result in current['hands']:
+            self.player_cards.extend(_RANK_CODES[card] for card in hand.cards)
+            self.hand_cards.append(len(self.player_cards))
+            self.hand_bet.append(hand.bet)
+            self.hand_result.append(result)
+        self.round_hands.append(len(self.hand_bet))
+        self.dealer_cards.extend(_RANK_CODES[card] for card in current['dealer'].cards)
+        self.round_dealer.append(len(self.dealer_cards))
+        for hand_index, action in current['actions']:
+            self.action_hand.append(hand_index)
+            self.action_code.append(_ACTION_INDEX[action])
+        self.round_actions.append(len(self.action_code))
+
+        self.rounds += 1
+        if self.rounds >= self.chunk_rounds:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rounds as one chunk"""
+        if not self.rounds:
+            return
+        columns = (
+            self.round_bet, self.round_result, self.round_hands, self.round_dealer, self.round_actions,
+            self.hand_cards, self.hand_bet, self.hand_result,
+            self.player_cards, self.dealer_cards, self.action_hand, self.action_code,
+        )
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(_HISTORY_HEADER.pack(
+            _HISTORY_MAGIC, self.rounds, len(self.hand_bet), len(self.player_cards), len(self.dealer_cards), len(self.action_code)
+        ))
+        for column in columns:
+            self._data.write(_column_bytes(column))
+        self._data.flush()
+        self._index.write(_HISTORY_INDEX_ENTRY.pack(offset, self.rounds))
+        self._index.flush()
+        self._reset_columns()
+
+    def close(self):
+        self._end_round()
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_hand_history(path: str):
+    """Lazily yield every recorded round as a dict, one chunk in memory at a time"""
+    with open(path + '.idx', 'rb') as index_file:
+        index = index_file.read()
+
+    with open(path, 'rb') as f:
+        for offset, _ in _HISTORY_INDEX_ENTRY.iter_unpack(index):
+            f.seek(offset)
+            magic, rounds, hands, player_cards, dealer_cards, actions = _HISTORY_HEADER.unpack(f.read(_HISTORY_HEADER.size))
+            if magic != _HISTORY_MAGIC:
+                raise ValueError(f"{path}: not a hand history chunk at offset {offset}")
+
+            sizes = (
+                ('i', rounds), ('d', rounds), ('I', rounds + 1), ('I', rounds + 1), ('I', rounds + 1),
+                ('I', hands + 1), ('i', hands), ('d', hands),
+                ('b', player_cards), ('b', dealer_cards), ('B', actions), ('b', actions),
+            )
+            data = f.read(sum(array(typecode).itemsize * count for typecode, count in sizes))
+            columns = []
+            position = 0
+            for typecode, count in sizes:
+                column, position = _read_column(typecode, data, position, count)
+                columns.append(column)
+            (round_bet, round_result, round_hands, round_dealer, round_actions,
+             hand_cards, hand_bet, hand_result, player_codes, dealer_codes, action_hand, action_code) = columns
+
+            for r in range(rounds):
+                yield {
+                    'bet': round_bet[r],
+                    'result': round_result[r],
+                    'player_hands': [
+                        {
+                            'cards': [CARD_RANKS[code] for code in player_codes[hand_cards[h]:hand_cards[h + 1]]],
+                            'bet': hand_bet[h],
+                            'result': hand_result[h],
+                        }
+                        for h in range(round_hands[r], round_hands[r + 1])
+                    ],
+                    'dealer_cards': [CARD_RANKS[code] for code in dealer_codes[round_dealer[r]:round_dealer[r + 1]]],
+                    'actions': [
+                        (action_hand[a], _ACTION_LIST[action_code[a]].value)
+                        for a in range(round_actions[r], round_actions[r + 1])
+                    ],
+                }
+
 class BlackjackGame:
-    def __init__(self, rules: Rules, strategy: BasicStrategy, base_bet=10):
+    def __init__(
+        self,
+        rules: Rules,
+        strategy: BasicStrategy,
+        base_bet=10,
+        rng: Optional[random.Random] = None,
+        verbose: bool = True,
+        events: Optional[GameEvents] = None,
+        counter: Optional[CardCounter] = None,
+        bet_ramp: Optional[BetRamp] = None,
+        shoe_source=None,
+        shoe_log: Optional[List[bytes]] = None,
+    ):
         self.rules = rules
         self.strategy = strategy
         self.base_bet = base_bet
+        self.rng = rng if rng is not None else random.Random()
+        # verbose games render to the console unless a sink is given; quiet ones emit to a no-op sink
+        self.events = events if events is not None else (ConsoleEvents() if verbose else GameEvents())
+        self._emit_draws = type(self.events).on_draw is not GameEvents.on_draw
+        self.counter = counter if counter is not None or bet_ramp is None else CardCounter(rules.decks)
+        self.bet_ramp = bet_ramp
+        self.round_bet = base_bet
+        self.profiler: Optional[GameProfiler] = None
+        # shoe_source (anything with next_shoe()) replaces shuffling; shoe_log collects every shoe's encoded order
+        self.shoe_source = shoe_source
+        self.shoe_log = shoe_log
         self.shoe = self._create_shoe()
-        self.discard_pile = []
+        # Cards are dealt from the front of the shoe; everything before shoe_position has been dealt
+        self.shoe_position = 0
+        self.cut_card = int(len(self.shoe) * rules.penetration)
         self.bankroll = 1000  # Starting bankroll in Rands
         self.hands_played = 0
 
         self.player_hands = []
         self.dealer_hand = None
+        self.insurance_bet = 0
+        self.even_money = False
+
+        # Rule flags read on every round, resolved once here; build a new game if the Rules change
+        self._blackjack_pays = rules.blackjack_pays
+        self._double_totals = DOUBLE_ON_TOTALS[rules.double_on]
+        self._double_after_split = rules.double_after_split
+        self._double_split_aces = rules.may_double_split_aces
+        self._max_split_hands = rules.max_split_hands
+        self._resplit_aces = rules.resplit_aces
+        self._one_card_split_aces = rules.one_card_split_aces
+        self._surrender = rules.surrender != 'none'
+        self._early_surrender = rules.surrender == 'early'
+        self._insurance = rules.insurance
 
     def _create_shoe(self) -> List[str]:
-        deck = []
-        for _ in range(self.rules.decks):
-            # Add 4 copies of each card value (proper deck composition)
-            for _ in range(4):
-                for value in ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']:
-                    deck.append(value)
-
-        random.shuffle(deck)
-        return deck
+        if self.shoe_source is not None:
+            deck = list(self.shoe_source.next_shoe())
+        else:
+            deck = []
+            for _ in range(self.rules.decks):
+                # Add 4 copies of each card value (proper deck composition)
+                for _ in range(4):
+                    for value in CARD_RANKS:
+                        deck.append(value)
+
+            self.rng.shuffle(deck)
 
-    def _draw_card(self) -> str:
-        if len(self.shoe) < 20:  # Reshuffle when shoe is low
-            print("Reshuffling the shoe...")
-            self.shoe = self._create_shoe()
-            self.discard_pile = []
+        if self.shoe_log is not None:
+            self.shoe_log.append(encode_shoe(deck))
+        return deck
 
-        card = self.shoe.pop()
-        self.discard_pile.append(card)
+    def _shuffle(self):
+        """Reshuffle the whole shoe in place, so no card list is rebuilt"""
+        if self.shoe_source is not None:
+            self.shoe[:] = self.shoe_source.next_shoe()
+        else:
+            self.rng.shuffle(self.shoe)
+        if self.shoe_log is not None:
+            self.shoe_log.append(encode_shoe(self.shoe))
+        self.shoe_position = 0
+        if self.counter is not None:
+            self.counter.reset()
+
+    def _shuffle_between_rounds(self):
+        """Reshuffle before dealing if the cut card is out (or every round with a CSM)"""
+        if self.rules.continuous_shuffle:
+            self._shuffle()
+        elif self.shoe_position >= self.cut_card:
+            self.events.on_reshuffle()
+            self._shuffle()
+
+    @property
+    def cards_remaining(self) -> int:
+        return len(self.shoe) - self.shoe_position
+
+    def enable_profiling(self, profiler: Optional[GameProfiler] = None) -> GameProfiler:
+        """Start timing the shuffle, draw, dealer play, settlement and strategy lookup phases"""
+        self.disable_profiling()
+        self.profiler = profiler if profiler is not None else GameProfiler()
+        for phase, method in GameProfiler.PHASES.items():
+            setattr(self, method, self.profiler.wrap(phase, getattr(self, method)))
+        self.strategy.get_recommendation = self.profiler.wrap(GameProfiler.STRATEGY_PHASE, self.strategy.get_recommendation)
+        return self.profiler
+
+    def disable_profiling(self) -> Optional[GameProfiler]:
+        """Restore the unwrapped methods and return the profiler that was attached"""
+        profiler = self.profiler
+        if profiler is not None:
+            for method in GameProfiler.PHASES.values():
+                del self.__dict__[method]
+            del self.strategy.__dict__['get_recommendation']
+            self.profiler = None
+        return profiler
+
+    def _draw_card(self, visible: bool = True) -> str:
+        if self.shoe_position == len(self.shoe):
+            # Only reached when the cut card sits too deep for a round in progress
+            self.events.on_reshuffle()
+            self._shuffle()
+
+        card = self.shoe[self.shoe_position]
+        self.shoe_position += 1
+        if visible and self.counter is not None:
+            self.counter.count(card)
+        if self._emit_draws:
+            self.events.on_draw(card, visible)
         return card
 
+    @staticmethod
+    def _has_live_hand(hands: List[Hand]) -> bool:
+        """Whether any hand still depends on the dealer's total (not busted, surrendered or a natural)"""
+        return any(not (hand.is_busted or hand.surrendered or hand.is_blackjack) for hand in hands)
+
     def _dealer_play(self) -> Hand:
         while self.dealer_hand.value < 17 or (self.dealer_hand.is_soft and self.dealer_hand.value == 17 and self.rules.dealer_hits_soft_17):
             self.dealer_hand.add_card(self._draw_card())
         return self.dealer_hand
 
-    def _determine_winner(self, player_hand: Hand, dealer_hand: Hand) -> int:
+    def _determine_winner(self, player_hand: Hand, dealer_hand: Hand) -> float:
         # Use a default bet of 1 for calculation if bet is 0 (advice mode)
         bet_amount = player_hand.bet if player_hand.bet > 0 else 1
-        
+
+        # Surrender returns half the bet (settled exactly, so odd bets lose exactly half)
+        if player_hand.surrendered:
+            return -bet_amount / 2
+
         # Player busts
         if player_hand.is_busted:
             return -bet_amount
 
-        # Dealer busts
-        if dealer_hand.is_busted:
-            return bet_amount
-
-        # Player has blackjack
+        # Player has blackjack (settled before the dealer's draws, which it never depends on)
         if player_hand.is_blackjack:
             if dealer_hand.is_blackjack:
                 return 0  # Push
             else:
-                return int(bet_amount * 1.5)  # Blackjack pays 3:2
+                return bet_amount * self._blackjack_pays  # 3:2, or 6:5 on short-paying tables
+
+        # Dealer busts
+        if dealer_hand.is_busted:
+            return bet_amount
 
         # Dealer has blackjack
         if dealer_hand.is_blackjack:
@@ -361,73 +1790,116 @@ class BlackjackGame:
             return 0  # Push
 
     def start_new_hand(self, bet: int):
-        # Deal initial cards
+        # Shuffle first, so a fresh shoe's first bet is sized from its own (reset) count
+        self._shuffle_between_rounds()
+        if self.bet_ramp is not None:
+            bet = self.bet_ramp.bet(self.counter.true_count, bet)
+        self.round_bet = bet
+        self.insurance_bet = 0
+        self.even_money = False
+
+        # Deal initial cards; the hole card is counted once it is revealed
         self.player_hands = [Hand([self._draw_card(), self._draw_card()], bet)]
-        self.dealer_hand = Hand([self._draw_card(), self._draw_card()])
+        self.dealer_hand = Hand([self._draw_card(), self._draw_card(visible=False)])
 
-        # Check for dealer blackjack
-        if self.dealer_hand.is_blackjack:
-            print("Dealer has Blackjack!")
-            for hand in self.player_hands:
-                if hand.is_blackjack:
-                    print("You also have Blackjack! It's a push.")
-                else:
-                    print("You lose this hand.")
+        self.events.on_deal(self.player_hands, self.dealer_hand)
+
+    def can_hit(self, hand: Hand) -> bool:
+        return not (hand.is_split_aces and self._one_card_split_aces)
+
+    def can_double(self, hand: Hand) -> bool:
+        if len(hand.cards) != 2:
+            return False
+        if hand.from_split and not (self._double_split_aces if hand.is_split_aces else self._double_after_split):
+            return False
+        return self._double_totals is None or hand.value in self._double_totals
+
+    def can_split(self, hand: Hand) -> bool:
+        if not hand.is_pair or len(self.player_hands) >= self._max_split_hands:
+            return False
+        return self._resplit_aces or not hand.is_split_aces
+
+    def can_surrender(self, hand: Hand) -> bool:
+        return self._surrender and len(hand.cards) == 2 and not hand.from_split
+
+    def insurance_offered(self) -> bool:
+        return self._insurance and self.dealer_hand.cards[0] == 'A'
+
+    def take_insurance(self):
+        """Insure the round for half its bet, or take even money on a blackjack"""
+        if self.player_hands[0].is_blackjack:
+            self.even_money = True
+        else:
+            self.insurance_bet = self.round_bet / 2
 
     def player_action(self, hand_index: int, action: Action) -> bool:
         """Perform player action and return True if hand is complete"""
         hand = self.player_hands[hand_index]
 
         if action == Action.HIT:
+            if not self.can_hit(hand):
+                self.events.on_rejected(hand_index, action, "Split aces receive one card only")
+                return False
             hand.add_card(self._draw_card())
-            print(f"You draw: {hand.cards[-1]}")
-            print(f"Your hand: {hand}")
+            self.events.on_action(hand_index, action, hand)
             if hand.is_busted:
-                print("BUST! This hand is complete.")
+                self.events.on_bust(hand_index, hand, False)
             return hand.is_busted or hand.stood
 
         elif action == Action.STAND:
             hand.stand()
-            print(f"You stand with: {hand}")
+            self.events.on_action(hand_index, action, hand)
             return True
 
         elif action == Action.DOUBLE:
-            if len(hand.cards) == 2:  # Can only double on first two cards
+            if self.can_double(hand):
                 hand.double_bet()
                 hand.add_card(self._draw_card())
                 hand.stand()
-                print(f"You double and draw: {hand.cards[-1]}")
-                print(f"Your hand: {hand}")
+                self.events.on_action(hand_index, action, hand)
                 if hand.is_busted:
-                    print("BUST! This doubled hand is complete.")
+                    self.events.on_bust(hand_index, hand, True)
                 return True
+            elif len(hand.cards) > 2:
+                self.events.on_rejected(hand_index, action, "Cannot double after hitting")
+                return False
             else:
-                print("Cannot double after hitting")
+                self.events.on_rejected(hand_index, action, "Cannot double this hand")
                 return False
 
         elif action == Action.SPLIT:
-            if hand.is_pair and len(hand.cards) == 2:
+            if self.can_split(hand):
                 # Split the hand
                 card1 = hand.cards[0]
                 card2 = hand.cards[1]
 
                 # Create two new hands
-                new_hand1 = Hand([card1, self._draw_card()], hand.bet)
-                new_hand2 = Hand([card2, self._draw_card()], hand.bet)
-
-                # Replace the current hand with the new hands
-                self.player_hands.pop(hand_index)
-                self.player_hands.insert(hand_index, new_hand2)
-                self.player_hands.insert(hand_index, new_hand1)
-
-                print(f"💫 SPLIT SUCCESSFUL! Original pair {card1},{card2} split into two hands:")
-                print(f"   Hand {hand_index + 1}: {new_hand1}")
-                print(f"   Hand {hand_index + 2}: {new_hand2}")
-                print(f"   Each hand maintains the original bet of R{hand.bet}")
-                print(f"   Cards drawn: {new_hand1.cards[1]} and {new_hand2.cards[1]}")
+                new_hand1 = Hand.split_from(card1, self._draw_card(), hand.bet)
+                new_hand2 = Hand.split_from(card2, self._draw_card(), hand.bet)
+                if new_hand1.is_split_aces and self._one_card_split_aces:
+                    # One card each; a hand that drew another ace stays open for a resplit decision
+                    for new_hand in (new_hand1, new_hand2):
+                        if not (self._resplit_aces and new_hand.is_pair):
+                            new_hand.stand()
+
+                # The first hand takes the pair's place and the second is played after
+                # the hands already in play, so a split is O(1) however many hands there are
+                self.player_hands[hand_index] = new_hand1
+                self.player_hands.append(new_hand2)
+
+                self.events.on_split(hand_index, (card1, card2), new_hand1, new_hand2, len(self.player_hands) - 1)
                 return False
             else:
-                print("Cannot split this hand")
+                self.events.on_rejected(hand_index, action, "Cannot split this hand")
+                return False
+
+        elif action == Action.SURRENDER:
+            if self.can_surrender(hand):
+                hand.surrender()
+                self.events.on_action(hand_index, action, hand)
+                return True
+            else:
+                self.events.on_rejected(hand_index, action, "Cannot surrender this hand")
                 return False
 
 
@@ -444,7 +1916,9 @@ class BlackjackGame:
             else:
                 return "WIN"
         elif result < 0:
-            if player_hand.is_busted:
+            if player_hand.surrendered:
+                return "SURRENDER"
+            elif player_hand.is_busted:
                 return "BUST LOSS"
             elif dealer_hand.is_blackjack and not player_hand.is_blackjack:
                 return "DEALER BLACKJACK LOSS"
@@ -453,31 +1927,1178 @@ class BlackjackGame:
         else:
             return "PUSH"
 
-    def complete_round(self) -> int:
+    def complete_round(self) -> float:
         """Complete the round after all player actions and return the net result"""
-        # Play dealer's hand
-        self._dealer_play()
-        print(f"Dealer's hand: {self.dealer_hand}")
-        
-        # Check if dealer busted
-        if self.dealer_hand.is_busted:
-            print("Dealer busted!")
+        if self.counter is not None:
+            self.counter.count(self.dealer_hand.cards[1])
+
+        # Play dealer's hand, unless every hand is already settled without it
+        if self._has_live_hand(self.player_hands):
+            self._dealer_play()
+        self.events.on_dealer_done(self.dealer_hand)
 
         # Determine results for all player hands
         total_result = 0
         for i, hand in enumerate(self.player_hands):
-            result = self._determine_winner(hand, self.dealer_hand)
+            if self.even_money and hand.is_blackjack:
+                result = hand.bet
+            else:
+                result = self._determine_winner(hand, self.dealer_hand)
             total_result += result
+            self.events.on_settle(i, hand, result)
 
-            if result > 0:
-                print(f"Hand {i+1} wins R{result}!")
-            elif result < 0:
-                print(f"Hand {i+1} loses R{abs(result)}!")
-            else:
-                print(f"Hand {i+1} pushes!")
+        # Insurance pays 2:1 when the dealer has blackjack
+        if self.insurance_bet:
+            insurance = 2 * self.insurance_bet if self.dealer_hand.is_blackjack else -self.insurance_bet
+            total_result += insurance
+            self.events.on_insurance(self.insurance_bet, insurance)
 
         return total_result
 
+    def play_strategy_round(self, bet: int) -> float:
+        """Play a full round with the strategy choosing every action and return the net result"""
+        self.start_new_hand(bet)
+        if self.insurance_offered() and self.strategy.take_insurance():
+            self.take_insurance()
+        if self._early_surrender:
+            self._offer_early_surrender(self.strategy)
+        if not self.dealer_hand.is_blackjack:
+            self._play_hands(self.strategy)
+        return self.complete_round()
+
+    def _offer_early_surrender(self, strategy: BasicStrategy):
+        """Let strategy surrender the opening hand before the dealer checks for blackjack"""
+        hand = self.player_hands[0]
+        if not hand.is_blackjack and strategy.get_recommendation(hand, self.dealer_hand.cards[0]) == Action.SURRENDER:
+            self.player_action(0, Action.SURRENDER)
+
+    def _play_hands(self, strategy: BasicStrategy):
+        """Let strategy play every hand in player_hands to completion"""
+        upcard = self.dealer_hand.cards[0]
+        i = 0
+        while i < len(self.player_hands):
+            hand = self.player_hands[i]
+            if hand.is_blackjack or hand.is_busted or hand.stood:
+                i += 1
+                continue
+
+            # The hand count limits resplits, which the solver-backed strategies value
+            hands = len(self.player_hands)
+            if not self.can_hit(hand):
+                # An open one-card split-ace pair may only be resplit or closed
+                resplit = self.can_split(hand) and strategy.get_recommendation(hand, upcard, hands=hands) == Action.SPLIT
+                action = Action.SPLIT if resplit else Action.STAND
+            else:
+                action = strategy.get_recommendation(hand, upcard, hands=hands)
+                action = strategy.resolve_play_action(
+                    hand,
+                    upcard,
+                    action,
+                    can_double=self.can_double(hand),
+                    can_split=self.can_split(hand),
+                    can_surrender=self.can_surrender(hand),
+                )
+
+            if self.player_action(i, action) or hand.is_busted:
+                i += 1
+
+class Seat:
+    """One player position at a BlackjackTable, with its own strategy and bet policy"""
+
+    def __init__(self, strategy: BasicStrategy, base_bet: int = 10, bet_ramp: Optional[BetRamp] = None):
+        self.strategy = strategy
+        self.base_bet = base_bet
+        self.bet_ramp = bet_ramp
+        self.round_bet = base_bet
+        self.player_hands: List[Hand] = []
+
+class BlackjackTable(BlackjackGame):
+    """Several seats playing against one shoe and one dealer hand per round
+
+    Cards go round the table as in a casino (one to each seat, the dealer's
+    upcard, a second to each seat, the hole card), seats act in order, the
+    dealer plays once and every seat is settled against that one dealer hand.
+    Seats with a bet ramp size their bets from the table's shared count.
+    """
+
+    def __init__(self, rules: Rules, seats: List[Seat], rng: Optional[random.Random] = None, counter: Optional[CardCounter] = None, **kwargs):
+        if counter is None and any(seat.bet_ramp is not None for seat in seats):
+            counter = CardCounter(rules.decks)
+        super().__init__(rules, seats[0].strategy, seats[0].base_bet, rng=rng, verbose=False, counter=counter, **kwargs)
+        self.seats = seats
+
+    def start_round(self):
+        self._shuffle_between_rounds()
+        for seat in self.seats:
+            bet = seat.base_bet
+            if seat.bet_ramp is not None:
+                bet = seat.bet_ramp.bet(self.counter.true_count, bet)
+            seat.round_bet = bet
+
+        first_cards = [self._draw_card() for _ in self.seats]
+        upcard = self._draw_card()
+        for seat, card in zip(self.seats, first_cards):
+            seat.player_hands = [Hand([card, self._draw_card()], seat.round_bet)]
+        self.dealer_hand = Hand([upcard, self._draw_card(visible=False)])
+
+    def settle_round(self) -> List[float]:
+        """Reveal the hole card, play the dealer once and settle every seat"""
+        if self.counter is not None:
+            self.counter.count(self.dealer_hand.cards[1])
+        if any(self._has_live_hand(seat.player_hands) for seat in self.seats):
+            self._dealer_play()
+
+        dealer_hand = self.dealer_hand
+        determine_winner = self._determine_winner
+        return [sum(determine_winner(hand, dealer_hand) for hand in seat.player_hands) for seat in self.seats]
+
+    def play_round(self) -> List[float]:
+        """Play one round with every seat's strategy and return each seat's net result"""
+        self.start_round()
+        for seat in self.seats:
+            self.player_hands = seat.player_hands  # player_action works on player_hands in place
+            if self._early_surrender:
+                self._offer_early_surrender(seat.strategy)
+            if not self.dealer_hand.is_blackjack:
+                self._play_hands(seat.strategy)
+        return self.settle_round()
+
+class SimulationResult(GameStats):
+    """Aggregate outcome of a headless simulation run"""
+
+    def __init__(self, bet: int = 10):
+        super().__init__()
+        self.bet = bet
+        self.net = 0
+        self.sum_squares = 0
+        self.total_wagered = 0
+        self.initial_wagered = 0
+        self.player_blackjacks = 0
+        self.dealer_blackjacks = 0
+        self.player_busts = 0
+        self.dealer_busts = 0
+        self.doubles = 0
+        self.splits = 0
+        self.outcomes: Dict[float, int] = defaultdict(int)  # round result -> rounds with that result
+
+    def record_round(self, game: BlackjackGame, result: float):
+        self.record(result, game.player_hands, game.round_bet, game.dealer_hand)
+
+    def record(self, result: float, player_hands: List[Hand], round_bet: int, dealer_hand: Hand):
+        self.add_result(result)
+        self.net += result
+        self.sum_squares += result * result
+        self.outcomes[result] += 1
+        self.initial_wagered += round_bet
+
+        for hand in player_hands:
+            self.total_wagered += hand.bet
+            if hand.is_busted:
+                self.player_busts += 1
+            if hand.bet > round_bet:
+                self.doubles += 1
+        self.splits += len(player_hands) - 1
+
+        if len(player_hands) == 1 and player_hands[0].is_blackjack:
+            self.player_blackjacks += 1
+        if dealer_hand.is_blackjack:
+            self.dealer_blackjacks += 1
+        elif dealer_hand.is_busted:
+            self.dealer_busts += 1
+
+    @property
+    def ev(self) -> float:
+        """Expected result per round in units of the initial bet"""
+        if self.total_hands == 0:
+            return 0.0
+        return self.net / (self.total_hands * self.bet)
+
+    @property
+    def variance(self) -> float:
+        """Per-round variance in squared units of the initial bet"""
+        if self.total_hands == 0:
+            return 0.0
+        mean_square = self.sum_squares / (self.total_hands * self.bet * self.bet)
+        return mean_square - self.ev * self.ev
+
+    @property
+    def edge(self) -> float:
+        """Net result per unit of initial bets actually placed (differs from ev under a bet ramp)"""
+        return self.net / self.initial_wagered if self.initial_wagered else 0.0
+
+    @property
+    def standard_error(self) -> float:
+        if self.total_hands == 0:
+            return 0.0
+        return (self.variance / self.total_hands) ** 0.5
+
+    def display_stats(self):
+        super().display_stats()
+        print(f"EV per hand: {self.ev * 100:+.3f}% (±{1.96 * self.standard_error * 100:.3f}%)")
+        print(f"Variance: {self.variance:.4f} | Net: {format_money(self.net)} on {format_money(self.total_wagered)} wagered")
+        print(f"Blackjacks: {self.player_blackjacks} | Doubles: {self.doubles} | Splits: {self.splits} | Busts: {self.player_busts}")
+        print("="*50)
+
+    def merge(self, other: 'SimulationResult') -> 'SimulationResult':
+        """Fold another partial result into this one (folded in a fixed order, merges are reproducible)"""
+        if other.bet != self.bet:
+            raise ValueError("Cannot merge simulation results with different bet sizes")
+        for name, value in vars(other).items():
+            if name == 'outcomes':
+                for result, rounds in value.items():
+                    self.outcomes[result] += rounds
+            elif name != 'bet':
+                setattr(self, name, getattr(self, name) + value)
+        return self
+
+def simulate(
+    rules: Rules,
+    strategy: BasicStrategy,
+    n_hands: int,
+    seed: Optional[int] = None,
+    bet: int = 10,
+    counting_system=None,
+    bet_ramp: Optional[BetRamp] = None,
+    index_plays: Optional[IndexPlays] = None,
+    profiler: Optional[GameProfiler] = None,
+    events: Optional[GameEvents] = None,
+) -> SimulationResult:
+    """Play n_hands rounds silently with the strategy deciding every action
+
+    With counting_system (or bet_ramp / index_plays, which imply Hi-Lo) the
+    shoe is counted, the bet ramp sizes every round's bet from the true count
+    and the index plays deviate from the strategy. A profiler, if given,
+    collects per-phase timings for the run, and events (e.g. a
+    HandHistoryWriter) receives every game event. Results are settled exactly,
+    so ev does not depend on the bet size.
+    """
+    if bet < 1:
+        raise ValueError("bet must be a positive amount")
+    if counting_system is None and (bet_ramp is not None or index_plays is not None):
+        counting_system = 'hi-lo'
+    counter = CardCounter(rules.decks, counting_system) if counting_system is not None else None
+    if index_plays is not None:
+        strategy = CountingStrategy(rules, counter, index_plays, strategy)
+    game = BlackjackGame(rules, strategy, bet, rng=random.Random(seed), verbose=False, events=events, counter=counter, bet_ramp=bet_ramp)
+    if profiler is not None:
+        game.enable_profiling(profiler)
+    stats = SimulationResult(bet)
+
+    for _ in range(n_hands):
+        result = game.play_strategy_round(bet)
+        stats.record_round(game, result)
+
+    game.disable_profiling()
+    return stats
+
+def simulate_table(rules: Rules, seats: List[Seat], n_rounds: int, seed: Optional[int] = None) -> List[SimulationResult]:
+    """Play n_rounds at a multi-seat table and return one result per seat"""
+    table = BlackjackTable(rules, seats, rng=random.Random(seed))
+    results = [SimulationResult(seat.base_bet) for seat in seats]
+
+    for _ in range(n_rounds):
+        for seat, stats, result in zip(seats, results, table.play_round()):
+            stats.record(result, seat.player_hands, seat.round_bet, table.dealer_hand)
+    return results
+
+def _shard_seeds(seed: Optional[int], workers: int) -> List[int]:
+    """Derive one independent, reproducible RNG seed per worker from the master seed"""
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(workers)]
+
+def _simulate_shard(args: tuple) -> SimulationResult:
+    return simulate(*args)
+
+def simulate_parallel(
+    rules: Rules,
+    strategy: BasicStrategy,
+    n_hands: int,
+    seed: Optional[int] = None,
+    bet: int = 10,
+    workers: Optional[int] = None,
+    counting_system=None,
+    bet_ramp: Optional[BetRamp] = None,
+    index_plays: Optional[IndexPlays] = None,
+) -> SimulationResult:
+    """Shard a simulation across a process pool and merge the partial results
+
+    Each worker gets its own RNG stream derived from seed, so the same seed and
+    worker count always reproduce identical totals.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, n_hands or 1))
+    per_worker, remainder = divmod(n_hands, workers)
+    shards = [
+        (rules, strategy, per_worker + (1 if i < remainder else 0), shard_seed, bet, counting_system, bet_ramp, index_plays)
+        for i, shard_seed in enumerate(_shard_seeds(seed, workers))
+    ]
+
+    total = SimulationResult(bet)
+    if workers == 1:
+        return total.merge(_simulate_shard(shards[0]))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_simulate_shard, shards):
+            total.merge(partial)
+    return total
+
+# Rules fields a sweep grid may vary, with the sweep table column for each
+SWEEP_COLUMNS = {
+    'decks': 'decks',
+    'dealer_hits_soft_17': 'h17',
+    'double_after_split': 'das',
+    'blackjack_pays': 'payout',
+    'penetration': 'penetration',
+    'surrender': 'surrender',
+}
+
+def sweep_cells(grid: Dict[str, list]) -> List[Rules]:
+    """Every Rules combination of the grid's field -> values lists"""
+    fields = list(grid)
+    return [rules_from_dict(dict(zip(fields, values))) for values in product(*(grid[field] for field in fields))]
+
+def _sweep_cell(args: tuple) -> Tuple[int, SimulationResult]:
+    """Play one cell in batches until its 95% confidence interval is narrow enough"""
+    cell, rules, strategy_class, seed, bet, batch_hands, min_hands, max_hands, target_ci = args
+    game = BlackjackGame(rules, strategy_class(rules), bet, rng=random.Random(seed), verbose=False)
+    stats = SimulationResult(bet)
+
+    while stats.total_hands < max_hands:
+        for _ in range(min(batch_hands, max_hands - stats.total_hands)):
+            stats.record_round(game, game.play_strategy_round(bet))
+        if stats.total_hands >= min_hands and 2 * 1.96 * stats.standard_error <= target_ci:
+            break
+    return cell, stats
+
+def sweep(
+    grid: Dict[str, list],
+    target_ci: float = 0.002,
+    batch_hands: int = 100_000,
+    min_hands: int = 200_000,
+    max_hands: int = 20_000_000,
+    seed: Optional[int] = None,
+    bet: int = 10,
+    workers: Optional[int] = None,
+    strategy_class=CompiledStrategy,
+    progress=None,
+) -> List[dict]:
+    """House edge for every Rules combination in grid, one process pool job per cell
+
+    Each cell stops as soon as the full width of its 95% confidence interval
+    on the edge (per initial bet) is at most target_ci, or at max_hands, so
+    cells that converge quickly free their worker for the rest of the grid.
+    progress, if given, is called with each finished row as cells complete.
+    Rows come back in grid order.
+    """
+    cells = sweep_cells(grid)
+    jobs = [
+        (cell, rules, strategy_class, cell_seed, bet, batch_hands, min_hands, max_hands, target_ci)
+        for cell, (rules, cell_seed) in enumerate(zip(cells, _shard_seeds(seed, len(cells))))
+    ]
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    rows: List[Optional[dict]] = [None] * len(cells)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(_sweep_cell, job) for job in jobs]):
+            cell, stats = future.result()
+            ci = 2 * 1.96 * stats.standard_error
+            row = {SWEEP_COLUMNS.get(field, field): getattr(cells[cell], field) for field in grid}
+            row.update(hands=stats.total_hands, house_edge=-stats.ev, ci95=ci, converged=ci <= target_ci)
+            rows[cell] = row
+            if progress is not None:
+                progress(row)
+    return rows
+
+def write_sweep_table(rows: List[dict], path: Optional[str] = None):
+    """Write sweep rows as CSV to path, or as an aligned table to stdout"""
+    if not rows:
+        return
+    columns = list(rows[0])
+    if path is not None:
+        import csv
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+
+    def cell_text(column, value):
+        if column in ('house_edge', 'ci95'):
+            return f"{value * 100:+.3f}%" if column == 'house_edge' else f"±{value * 50:.3f}%"
+        return str(value)
+
+    table = [columns] + [[cell_text(column, row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    for line in table:
+        print("  ".join(text.rjust(width) for text, width in zip(line, widths)))
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("NumPy is required for the vectorized shoe and bankroll analysis (pip install numpy)") from e
+    return numpy
+
+class NumpyShoe:
+    """Batch shoe backend for many tables dealt in lockstep
+
+    Every table's shoe is a row of numpy.int8 rank codes (see CARD_RANKS).
+    All rows are shuffled in one call and dealing just advances a per-table
+    index, so no Python object is allocated per card. Callers dealing codes
+    directly reshuffle between rounds with reshuffle_low(); dealing past the
+    end of a shoe raises ValueError.
+
+    source(table) plugs a row into a BlackjackGame as its shoe_source, as
+    simulate_lockstep() does for many tables: a game takes its row whole, and
+    the next time any table needs a shoe every row already taken is
+    reshuffled in that one call.
+    """
+
+    def __init__(self, rules: Rules, tables: int = 1, seed: Optional[int] = None, reshuffle_at: Optional[int] = None):
+        np = _require_numpy()
+        self.rules = rules
+        self.tables = tables
+        self.rng = np.random.default_rng(seed)
+
+        deck = np.repeat(np.arange(len(CARD_RANKS), dtype=np.int8), 4 * rules.decks)
+        self.cards = np.tile(deck, (tables, 1))
+        # By default reshuffle where the rules place the cut card
+        self.reshuffle_at = reshuffle_at if reshuffle_at is not None else self.size - int(self.size * rules.penetration)
+        self.positions = np.zeros(tables, dtype=np.int64)
+        self._rows = np.arange(tables)
+        self._taken = np.zeros(tables, dtype=bool)
+        self.shuffle()
+
+    @property
+    def size(self) -> int:
+        return self.cards.shape[1]
+
+    @property
+    def remaining(self):
+        """Cards left in each table's shoe"""
+        return self.size - self.positions
+
+    def shuffle(self, mask=None):
+        """Reshuffle every table's shoe in place, or only the tables selected by mask"""
+        if mask is None:
+            self.cards[:] = self.rng.permuted(self.cards, axis=1)
+            self.positions[:] = 0
+        else:
+            self.cards[mask] = self.rng.permuted(self.cards[mask], axis=1)
+            self.positions[mask] = 0
+
+    def reshuffle_low(self):
+        """Reshuffle the tables whose shoe has dropped below the reshuffle point; returns their mask"""
+        low = self.remaining < self.reshuffle_at
+        if low.any():
+            self.shuffle(low)
+        return low
+
+    def _check_remaining(self, count: int, mask=None):
+        remaining = self.remaining if mask is None else self.remaining[mask]
+        if remaining.size and remaining.min() < count:
+            raise ValueError(f"Cannot deal {count} card(s): a shoe has only {remaining.min()} left; call reshuffle_low() first")
+
+    def deal(self, mask=None):
+        """Deal one card to every table (or to the tables selected by mask) and return the rank codes
+
+        Tables not selected by mask get -1.
+        """
+        np = _require_numpy()
+        self._check_remaining(1, mask)
+        if mask is None:
+            codes = self.cards[self._rows, self.positions]
+            self.positions += 1
+            return codes
+
+        codes = np.full(self.tables, -1, dtype=np.int8)
+        codes[mask] = self.cards[self._rows[mask], self.positions[mask]]
+        self.positions[mask] += 1
+        return codes
+
+    def deal_many(self, count: int):
+        """Deal count cards to every table at once; returns a (tables, count) array of rank codes"""
+        np = _require_numpy()
+        self._check_remaining(count)
+        columns = self.positions[:, None] + np.arange(count)
+        codes = self.cards[self._rows[:, None], columns]
+        self.positions += count
+        return codes
+
+    def dealt(self, table: int):
+        """Rank codes already dealt from a table's current shoe (the discard pile)"""
+        return self.cards[table, :self.positions[table]]
+
+    def source(self, table: int) -> '_NumpyShoeSource':
+        """A shoe_source for a BlackjackGame that plays this table"""
+        return _NumpyShoeSource(self, table)
+
+    def take(self, table: int) -> List[str]:
+        """Hand a table's whole shoe to its game as card names, reshuffling taken rows first"""
+        if self._taken[table]:
+            self.shuffle(self._taken.copy())
+            self._taken[:] = False
+        self._taken[table] = True
+        self.positions[table] = self.size
+        return self.card_names(self.cards[table].tolist())
+
+    @staticmethod
+    def card_names(codes) -> List[str]:
+        return [CARD_RANKS[code] for code in codes]
+
+class _NumpyShoeSource:
+    def __init__(self, shoe: NumpyShoe, table: int):
+        self.shoe = shoe
+        self.table = table
+
+    def next_shoe(self) -> List[str]:
+        return self.shoe.take(self.table)
+
+def simulate_lockstep(
+    rules: Rules, strategy: BasicStrategy, n_rounds: int, tables: int = 64, seed: Optional[int] = None, bet: int = 10
+) -> SimulationResult:
+    """Play n_rounds at each of many independent tables sharing one NumpyShoe (needs NumPy)
+
+    Every round is played at every table before the next one starts, so the
+    tables reach their cut cards together and their shoes are reshuffled in
+    batches (with a continuous shuffler, one call per round for all tables).
+    Returns the combined result of tables * n_rounds rounds.
+    """
+    if bet < 1:
+        raise ValueError("bet must be a positive amount")
+    shoe = NumpyShoe(rules, tables, seed)
+    games = [BlackjackGame(rules, strategy, bet, verbose=False, shoe_source=shoe.source(table)) for table in range(tables)]
+    stats = SimulationResult(bet)
+    for _ in range(n_rounds):
+        for game in games:
+            stats.record_round(game, game.play_strategy_round(bet))
+    return stats
+
+def outcome_distribution(outcomes) -> Tuple[List[float], List[float]]:
+    """Per-round results in units of the initial bet, with their probabilities
+
+    outcomes is a SimulationResult (its observed round results) or a dict of
+    result in bet units -> probability or count, e.g. an exact distribution.
+    """
+    if isinstance(outcomes, SimulationResult):
+        outcomes = {result / outcomes.bet: rounds for result, rounds in outcomes.outcomes.items()}
+    total = sum(outcomes.values())
+    if total <= 0:
+        raise ValueError("Outcome distribution is empty")
+    values = sorted(outcomes)
+    return values, [outcomes[value] / total for value in values]
+
+def n0(ev: float, variance: float) -> float:
+    """Rounds needed for the expected win to equal one standard deviation (variance / ev^2)"""
+    return variance / (ev * ev) if ev > 0 else float('inf')
+
+def kelly_fraction(ev: float, variance: float) -> float:
+    """Share of the bankroll to bet per round for maximum growth (ev / variance); 0 without an edge"""
+    return ev / variance if ev > 0 and variance > 0 else 0.0
+
+class BankrollAnalysis:
+    """Result of simulate_bankroll: ruin statistics and percentile bankroll curves
+
+    rounds holds the round numbers the curves were sampled at (0 is the
+    starting bankroll); percentiles maps each requested percentile to the
+    bankroll at those rounds across all paths.
+    """
+
+    def __init__(self, bankroll: float, bet: float, ev: float, variance: float, rounds, percentiles: Dict[float, object], ruin_round, final):
+        self.bankroll = bankroll
+        self.bet = bet
+        self.ev = ev
+        self.variance = variance
+        self.rounds = rounds
+        self.percentiles = percentiles
+        self.ruin_round = ruin_round  # round each path went broke on, -1 if it never did
+        self.final = final
+
+    @property
+    def risk_of_ruin(self) -> float:
+        return float((self.ruin_round >= 0).mean())
+
+    @property
+    def median(self):
+        return self.percentiles[50]
+
+    @property
+    def n0(self) -> float:
+        return n0(self.ev, self.variance)
+
+    @property
+    def kelly_fraction(self) -> float:
+        return kelly_fraction(self.ev, self.variance)
+
+    @property
+    def kelly_bet(self) -> float:
+        """Full-Kelly bet for the starting bankroll"""
+        return self.kelly_fraction * self.bankroll
+
+    @property
+    def analytic_risk_of_ruin(self) -> float:
+        """Diffusion approximation exp(-2 * ev * bankroll / variance) for unlimited play"""
+        if self.ev <= 0:
+            return 1.0
+        units = self.bankroll / self.bet
+        return math.exp(-2 * self.ev * units / self.variance)
+
+    def summary(self) -> str:
+        lines = [
+            f"Risk of ruin: {self.risk_of_ruin:.2%} over {int(self.rounds[-1])} rounds "
+            f"(unlimited play, approx.: {self.analytic_risk_of_ruin:.2%})",
+            f"EV per round: {self.ev * 100:+.3f}% | SD: {self.variance ** 0.5:.3f} bets | N0: {self.n0:,.0f} rounds",
+            f"Kelly: {self.kelly_fraction:.3%} of bankroll (R{self.kelly_bet:.2f} per round)",
+        ]
+        lines += [f"P{p:g} final bankroll: R{curve[-1]:.0f}" for p, curve in self.percentiles.items()]
+        return "\n".join(lines)
+
+def simulate_bankroll(
+    outcomes,
+    bankroll: float,
+    n_rounds: int,
+    paths: int = 10_000,
+    bet: float = 10,
+    seed: Optional[int] = None,
+    percentiles=(5, 25, 50, 75, 95),
+    samples: int = 100,
+    chunk_rounds: int = 1000,
+) -> BankrollAnalysis:
+    """Simulate many bankroll trajectories at once from a per-round outcome distribution (needs NumPy)
+
+    All paths advance together: each chunk of rounds is drawn as a
+    (paths, chunk_rounds) array and accumulated with cumsum. A path is ruined
+    once it cannot cover another bet, and stays at its last bankroll (never
+    below zero) from then on.
+    """
+    np = _require_numpy()
+    values, probabilities = outcome_distribution(outcomes)
+    results = np.asarray(values) * bet
+    ev = float(np.dot(values, probabilities))
+    variance = float(np.dot(np.square(values), probabilities)) - ev * ev
+    rng = np.random.default_rng(seed)
+
+    sample_rounds = np.unique(np.linspace(0, n_rounds, samples + 1).astype(np.int64))
+    curves = np.empty((len(sample_rounds), paths))
+    curves[0] = bankroll
+    next_sample = 1
+
+    current = np.full(paths, float(bankroll))
+    ruin_round = np.full(paths, -1, dtype=np.int64)
+    for start in range(0, n_rounds, chunk_rounds):
+        count = min(chunk_rounds, n_rounds - start)
+        steps = results[rng.choice(len(results), size=(paths, count), p=probabilities)]
+        steps[ruin_round >= 0] = 0.0
+        trajectory = current[:, None] + np.cumsum(steps, axis=1)
+
+        # Freeze every path from the first round it can no longer cover a bet
+        broke = np.maximum.accumulate(trajectory < bet, axis=1)
+        newly_ruined = broke[:, -1] & (ruin_round < 0)
+        first = broke.argmax(axis=1)
+        ruin_round[newly_ruined] = start + first[newly_ruined] + 1
+        frozen = np.maximum(trajectory[np.arange(paths), first], 0.0)
+        trajectory = np.where(broke, frozen[:, None], trajectory)
+
+        while next_sample < len(sample_rounds) and sample_rounds[next_sample] <= start + count:
+            curves[next_sample] = trajectory[:, sample_rounds[next_sample] - start - 1]
+            next_sample += 1
+        current = trajectory[:, -1]
+
+    curve_percentiles = {p: np.percentile(curves, p, axis=1) for p in percentiles}
+    return BankrollAnalysis(bankroll, bet, ev, variance, sample_rounds, curve_percentiles, ruin_round, current)
+
+def encode_shoe(shoe: List[str]) -> bytes:
+    """Shoe order as one rank code (index into CARD_RANKS) per byte"""
+    return bytes(_RANK_CODES[card] for card in shoe)
+
+def decode_shoe(data: bytes) -> List[str]:
+    return [CARD_RANKS[code] for code in data]
+
+def record_shoes(rules: Rules, n_shoes: int, seed: Optional[int] = None) -> List[bytes]:
+    """Shuffle n_shoes shoes exactly as BlackjackGame would with the same seed"""
+    shoes = []
+    game = BlackjackGame(rules, BasicStrategy(rules), rng=random.Random(seed), verbose=False, shoe_log=shoes)
+    for _ in range(n_shoes - 1):
+        game._shuffle()
+    return shoes
+
+def save_shoes(path: str, shoes: List[bytes]):
+    with open(path, 'wb') as f:
+        for shoe in shoes:
+            f.write(struct.pack('<I', len(shoe)))
+            f.write(shoe)
+
+def load_shoes(path: str) -> List[bytes]:
+    shoes = []
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(4)
+            if not header:
+                return shoes
+            (length,) = struct.unpack('<I', header)
+            shoes.append(f.read(length))
+
+class ShoeReplay:
+    """Recorded shoes decoded once and shared by every game replaying them
+
+    Each game gets its own cursor from source(); a decoded shoe is dropped
+    from the cache once every cursor has moved past it.
+    """
+
+    def __init__(self, shoes: List[bytes]):
+        self.shoes = shoes
+        self._decoded: Dict[int, List[str]] = {}
+        self._cursors: List['_ReplayCursor'] = []
+
+    def source(self) -> '_ReplayCursor':
+        cursor = _ReplayCursor(self)
+        self._cursors.append(cursor)
+        return cursor
+
+    def shoe(self, index: int) -> List[str]:
+        if index >= len(self.shoes):
+            raise ValueError(f"Replay ran out of recorded shoes ({len(self.shoes)})")
+        decoded = self._decoded.get(index)
+        if decoded is None:
+            decoded = self._decoded[index] = decode_shoe(self.shoes[index])
+            oldest = min(cursor.position for cursor in self._cursors)
+            for stale in [i for i in self._decoded if i < oldest - 1]:
+                del self._decoded[stale]
+        return decoded
+
+class _ReplayCursor:
+    def __init__(self, replay: ShoeReplay):
+        self.replay = replay
+        self.position = 0
+
+    def next_shoe(self) -> List[str]:
+        """The shared decoded shoe; games copy it into their own shoe list and never mutate it"""
+        shoe = self.replay.shoe(self.position)
+        self.position += 1
+        return shoe
+
+def replay(rules: Rules, strategies: Dict[str, BasicStrategy], shoes: List[bytes], n_hands: int, bet: int = 10) -> Dict[str, SimulationResult]:
+    """Play the same recorded shoes against several strategies in one pass
+
+    Every strategy sees the identical card sequence (common random numbers),
+    so differences between the results reflect the strategies rather than
+    the luck of the deal.
+    """
+    shared = ShoeReplay(shoes)
+    games = {
+        name: BlackjackGame(rules, strategy, bet, verbose=False, shoe_source=shared.source())
+        for name, strategy in strategies.items()
+    }
+    results = {name: SimulationResult(bet) for name in strategies}
+
+    for _ in range(n_hands):
+        for name, game in games.items():
+            results[name].record_round(game, game.play_strategy_round(bet))
+    return results
+
+# Advice server: a small HTTP/JSON front end to the strategy engine for local clients
+
+ADVICE_SERVER_HOST = '127.0.0.1'  # loopback only unless a host is passed explicitly
+ADVICE_SERVER_PORT = 8765
+
+HTTP_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def rules_from_dict(fields: Optional[dict]) -> Rules:
+    """Rules from a JSON object of Rules keyword arguments; missing fields keep their defaults
+
+    Every field is type- and range-checked, so bad client input raises
+    ValueError here rather than failing later inside a game or the solver.
+    """
+    if fields is None:
+        return Rules()
+    if not isinstance(fields, dict):
+        raise ValueError("rules must be an object")
+    defaults = vars(Rules())
+    unknown = set(fields) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown rules field(s): {', '.join(sorted(unknown))}")
+    for name, value in fields.items():
+        if isinstance(defaults[name], bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"{name} must be true or false")
+        elif isinstance(defaults[name], str):
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string")
+    for name, low, high in (('decks', 1, 8), ('max_split_hands', 1, 8)):
+        value = fields.get(name, defaults[name])
+        if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+            raise ValueError(f"{name} must be an integer from {low} to {high}")
+    penetration = fields.get('penetration', defaults['penetration'])
+    if isinstance(penetration, bool) or not isinstance(penetration, (int, float)) or not 0 < penetration <= 1:
+        raise ValueError("penetration must be a number above 0 and at most 1")
+    blackjack_pays = fields.get('blackjack_pays', defaults['blackjack_pays'])
+    if isinstance(blackjack_pays, bool) or not isinstance(blackjack_pays, (int, float)) or not 0 < blackjack_pays <= 10:
+        raise ValueError("blackjack_pays must be a number above 0 and at most 10")
+    return Rules(**fields)
+
+def _simulation_job(rules: Rules, n_hands: int, seed: Optional[int], bet: int) -> dict:
+    """Run one simulation job in a worker process and summarize it as JSON-ready values"""
+    return simulation_summary(simulate(rules, CompiledStrategy(rules), n_hands, seed=seed, bet=bet))
+
+def simulation_summary(stats: SimulationResult) -> dict:
+    """Headline numbers of a simulation as JSON-ready values"""
+    return {
+        'hands': stats.total_hands,
+        'net': stats.net,
+        'ev': stats.ev,
+        'ci95': 1.96 * stats.standard_error,
+        'variance': stats.variance,
+        'wins': stats.wins,
+        'losses': stats.losses,
+        'pushes': stats.pushes,
+        'blackjacks': stats.player_blackjacks,
+        'doubles': stats.doubles,
+        'splits': stats.splits,
+    }
+
+class MicroBatcher:
+    """Coalesce concurrent advice queries into one batch call
+
+    Queries wait at most window seconds (or until max_batch queries are
+    pending) and are then answered by a single run_batch(player_cards,
+    upcards) call. With an executor the batch runs off the event loop.
+    """
+
+    def __init__(self, run_batch, window: float = 0.002, max_batch: int = 1024, executor=None):
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.executor = executor
+        self.pending: List[tuple] = []  # (player_cards, upcards, future) per request
+        self.pending_queries = 0
+        self.batches = 0
+        self._timer = None
+
+    async def submit(self, player_cards: List[List[str]], upcards: List[str]) -> list:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((player_cards, upcards, future))
+        self.pending_queries += len(player_cards)
+        if self.pending_queries >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending, self.pending_queries = self.pending, [], 0
+        if batch:
+            import asyncio
+
+            self.batches += 1
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[tuple]):
+        player_cards = [cards for request in batch for cards in request[0]]
+        upcards = [upcard for request in batch for upcard in request[1]]
+        try:
+            if self.executor is None:
+                results = self.run_batch(player_cards, upcards)
+            else:
+                import asyncio
+
+                results = await asyncio.get_running_loop().run_in_executor(self.executor, self.run_batch, player_cards, upcards)
+        except Exception as error:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        start = 0
+        for cards, _, future in batch:
+            if not future.done():
+                future.set_result(results[start:start + len(cards)])
+            start += len(cards)
+
+class AdviceServer:
+    """asyncio HTTP/JSON server for strategy advice and simulation jobs
+
+    POST /recommend and POST /ev take {"hands": [[cards], ...], "upcards":
+    [...], "rules": {...}} and answer with one action code (or one EV table)
+    per hand; concurrent requests with the same strategy rules share a
+    micro-batch. POST /simulate starts a simulation on the worker process
+    pool and returns a job id to poll with GET /jobs/<id>. GET /health
+    reports liveness.
+    """
+
+    def __init__(
+        self,
+        host: str = ADVICE_SERVER_HOST,
+        port: int = ADVICE_SERVER_PORT,
+        workers: Optional[int] = None,
+        batch_window: float = 0.002,
+        max_batch: int = 1024,
+        max_job_hands: int = 10_000_000,
+        max_body: int = 1 << 20,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_job_hands = max_job_hands
+        self.max_body = max_body
+        self.jobs: Dict[str, dict] = {}
+        self._last_job = 0
+        self._engines: Dict[tuple, tuple] = {}  # _rules_key -> (advisor, recommend batcher, EV batcher)
+        self._server = None
+        self._pool = None
+        self._solver_thread = None
+
+    async def start(self) -> int:
+        """Start listening and return the bound port (useful with port=0)"""
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._pool = self._new_pool()
+        # One thread runs every EV batch, so the solver caches are never shared across threads
+        self._solver_thread = ThreadPoolExecutor(max_workers=1)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    def _new_pool(self) -> 'concurrent.futures.ProcessPoolExecutor':
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Spawned (not forked) workers, so they never inherit the listening or client sockets
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _restart_pool(self, broken: 'concurrent.futures.ProcessPoolExecutor'):
+        """Replace a broken process pool (a worker died), unless it was already replaced"""
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for executor in (self._pool, self._solver_thread):
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        self._pool = self._solver_thread = None
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def _engine(self, rules: Rules) -> tuple:
+        key = _rules_key(rules)
+        engine = self._engines.get(key)
+        if engine is None:
+            advisor = BatchAdvisor(rules)
+            engine = self._engines[key] = (
+                advisor,
+                MicroBatcher(advisor.recommend, self.batch_window, self.max_batch),
+                MicroBatcher(advisor.evaluate, self.batch_window, self.max_batch, self._solver_thread),
+            )
+        return engine
+
+    async def _handle_connection(self, reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter'):
+        import asyncio
+
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as error:
+                    await self._respond(writer, error.status, {'error': str(error)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except HTTPError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except ValueError as error:
+                    status, payload = 400, {'error': str(error)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: 'asyncio.StreamReader') -> Optional[tuple]:
+        """(method, path, body, keep_alive) for the next request, or None once the client hangs up"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        return method, path, body, keep_alive
+
+    async def _respond(self, writer: 'asyncio.StreamWriter', status: int, payload: dict, keep_alive: bool):
+        import json
+
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        routes = {
+            '/health': ('GET', self._health),
+            '/recommend': ('POST', self._recommend),
+            '/ev': ('POST', self._ev),
+            '/simulate': ('POST', self._simulate),
+        }
+        if path.startswith('/jobs/'):
+            route = ('GET', self._job)
+        elif path in routes:
+            route = routes[path]
+        else:
+            raise HTTPError(404, f"No such endpoint: {path}")
+        if method != route[0]:
+            raise HTTPError(405, f"{path} only accepts {route[0]}")
+
+        if method == 'GET':
+            return await route[1](path)
+        import json
+
+        try:
+            document = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(document, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return await route[1](document)
+
+    async def _health(self, path: str) -> Tuple[int, dict]:
+        return 200, {'status': 'ok', 'jobs': len(self.jobs)}
+
+    def _queries(self, document: dict) -> tuple:
+        hands, upcards = document.get('hands'), document.get('upcards')
+        if not isinstance(hands, list) or not isinstance(upcards, list) or not all(isinstance(cards, list) for cards in hands):
+            raise ValueError("hands must be a list of card lists and upcards a list of cards")
+        hands = [[str(card).upper() for card in cards] for cards in hands]
+        upcards = [str(card).upper() for card in upcards]
+        rules = rules_from_dict(document.get('rules'))
+        BatchAdvisor._check(hands, upcards, rules.decks)
+        return self._engine(rules), hands, upcards
+
+    async def _recommend(self, document: dict) -> Tuple[int, dict]:
+        (_, batcher, _), hands, upcards = self._queries(document)
+        actions = await batcher.submit(hands, upcards)
+        return 200, {'actions': [action.value for action in actions]}
+
+    async def _ev(self, document: dict) -> Tuple[int, dict]:
+        (_, _, batcher), hands, upcards = self._queries(document)
+        evs = await batcher.submit(hands, upcards)
+        return 200, {'evs': [{action.value: ev for action, ev in table.items()} for table in evs]}
+
+    async def _simulate(self, document: dict) -> Tuple[int, dict]:
+        rules = rules_from_dict(document.get('rules'))
+        n_hands, seed, bet = document.get('hands', 100_000), document.get('seed'), document.get('bet', 10)
+        # JSON true/false are bools, which are ints to isinstance
+        if isinstance(n_hands, bool) or not isinstance(n_hands, int) or not 1 <= n_hands <= self.max_job_hands:
+            raise ValueError(f"hands must be an integer from 1 to {self.max_job_hands}")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            raise ValueError("seed must be an integer")
+        if isinstance(bet, bool) or not isinstance(bet, int) or bet < 1:
+            raise ValueError("bet must be a positive integer")
+
+        import asyncio
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self._pool
+        try:
+            future = asyncio.get_running_loop().run_in_executor(pool, _simulation_job, rules, n_hands, seed, bet)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise HTTPError(503, "Simulation workers crashed and were restarted; submit the job again")
+        self._last_job += 1
+        job_id = str(self._last_job)
+        job = self.jobs[job_id] = {'id': job_id, 'status': 'running', 'hands': n_hands}
+        future.add_done_callback(lambda done: self._finish_job(job, done, pool))
+        return 202, dict(job)
+
+    def _finish_job(self, job: dict, future: 'asyncio.Future', pool: 'concurrent.futures.ProcessPoolExecutor'):
+        from concurrent.futures.process import BrokenProcessPool
+
+        if future.cancelled():
+            job['status'] = 'cancelled'
+        elif future.exception() is not None:
+            job.update(status='failed', error=str(future.exception()) or type(future.exception()).__name__)
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._restart_pool(pool)
+        else:
+            job.update(status='done', result=future.result())
+
+    async def _job(self, path: str) -> Tuple[int, dict]:
+        job = self.jobs.get(path[len('/jobs/'):])
+        if job is None:
+            raise HTTPError(404, f"No such job: {path[len('/jobs/'):]}")
+        return 200, job
+
+def serve(host: str = ADVICE_SERVER_HOST, port: int = ADVICE_SERVER_PORT, workers: Optional[int] = None):
+    """Run the advice server until interrupted"""
+    import asyncio
+
+    server = AdviceServer(host, port, workers)
+
+    async def run():
+        await server.start()
+        print(f"Serving blackjack advice on http://{server.host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
 def validate_card(card: str) -> bool:
     valid_cards = [str(i) for i in range(2, 11)] + ['J', 'Q', 'K', 'A']
     return card.upper() in valid_cards
@@ -551,8 +3172,10 @@ def get_action_input(prompt: str) -> Action:
                 return Action.DOUBLE
             elif action == 'SP':
                 return Action.SPLIT
+            elif action == 'SU':
+                return Action.SURRENDER
             else:
-                print("Invalid action. Please use H (Hit), ST (Stand), D (Double), SP (Split)")
+                print("Invalid action. Please use H (Hit), ST (Stand), D (Double), SP (Split), SU (Surrender)")
 
         except KeyboardInterrupt:
             print("\nGoodbye!")
@@ -560,6 +3183,7 @@ def get_action_input(prompt: str) -> Action:
 
 def execute_recommended_action(player_hand: Hand, dealer_card: str, action: Action, game=None):
     """Execute the recommended action - minimal output"""
+    strategy = game.strategy if game is not None else default_advisor().strategy
     if action == Action.HIT:
         # If game is provided, draw from the shoe automatically
         if game is not None:
@@ -590,7 +3214,6 @@ def execute_recommended_action(player_hand: Hand, dealer_card: str, action: Acti
         if player_hand.is_busted:
             print("BUST")
         else:
-            strategy = BasicStrategy(Rules())
             next_rec = strategy.get_recommendation(player_hand, dealer_card)
             print(f"Next: {next_rec.value}")
     
@@ -658,18 +3281,22 @@ def execute_recommended_action(player_hand: Hand, dealer_card: str, action: Acti
             print(f"H1: {hand1}")
             print(f"H2: {hand2}")
             
-            strategy = BasicStrategy(Rules())
             rec1 = strategy.get_recommendation(hand1, dealer_card)
             rec2 = strategy.get_recommendation(hand2, dealer_card)
             print(f"H1 next: {rec1.value} | H2 next: {rec2.value}")
         else:
             print("Can't split, hitting")
             execute_recommended_action(player_hand, dealer_card, Action.HIT, game)
+
+    elif action == Action.SURRENDER:
+        player_hand.surrender()
+        print("Surrendering: half the bet back")
     
 
 
-def simulate_action(player_hand: Hand, dealer_card: str, action: Action):
+def simulate_action(player_hand: Hand, dealer_card: str, action: Action, advisor: Optional[BatchAdvisor] = None):
     """Simulate taking an action and show the result"""
+    advisor = advisor if advisor is not None else default_advisor()
     print(f"\nSimulating {action.value}...")
     
     if action == Action.HIT:
@@ -697,14 +3324,13 @@ def simulate_action(player_hand: Hand, dealer_card: str, action: Action):
             print("BUST! Hand is over.")
         else:
             # Get new recommendation
-            strategy = BasicStrategy(Rules())
-            new_recommendation = strategy.get_recommendation(player_hand, dealer_card)
+            new_recommendation = advisor.strategy.get_recommendation(player_hand, dealer_card)
             print(f"New recommendation: {new_recommendation.value}")
             
             # Ask if they want to continue simulating
             continue_sim = input("Continue simulating actions? (Y/N): ").strip().upper()
             if continue_sim == 'Y':
-                simulate_action(player_hand, dealer_card, new_recommendation)
+                simulate_action(player_hand, dealer_card, new_recommendation, advisor)
     
     elif action == Action.STAND:
         print("You stand with your current hand.")
@@ -770,9 +3396,7 @@ def simulate_action(player_hand: Hand, dealer_card: str, action: Action):
             print(f"   Cards drawn: {card1_drawn} and {card2_drawn}")
             
             # Get recommendations for each hand
-            strategy = BasicStrategy(Rules())
-            rec1 = strategy.get_recommendation(hand1, dealer_card)
-            rec2 = strategy.get_recommendation(hand2, dealer_card)
+            rec1, rec2 = advisor.recommend([hand1.cards, hand2.cards], [dealer_card, dealer_card])
             
             print(f"\n📋 STRATEGY RECOMMENDATIONS:")
             print(f"   Hand 1 recommendation: {rec1.value}")
@@ -782,14 +3406,17 @@ def simulate_action(player_hand: Hand, dealer_card: str, action: Action):
             sim_hand1 = input("Simulate actions for Hand 1? (Y/N): ").strip().upper()
             if sim_hand1 == 'Y':
                 print("\n--- SIMULATING HAND 1 ---")
-                simulate_action(hand1, dealer_card, rec1)
+                simulate_action(hand1, dealer_card, rec1, advisor)
             
             sim_hand2 = input("Simulate actions for Hand 2? (Y/N): ").strip().upper()
             if sim_hand2 == 'Y':
                 print("\n--- SIMULATING HAND 2 ---")
-                simulate_action(hand2, dealer_card, rec2)
+                simulate_action(hand2, dealer_card, rec2, advisor)
         else:
             print("Cannot split: hand is not a pair or has more than 2 cards.")
+
+    elif action == Action.SURRENDER:
+        print("You give up the hand and get half your bet back.")
     
 
 
@@ -899,6 +3526,15 @@ def game_advice_mode():
             # Clean, minimal display
             print(f"\n{player_hand} vs {dealer_card}")
             print(f"ACTION: {recommendation.value}")
+
+            # Exact dealer outcome odds from the cards still in the shoe
+            try:
+                composition = shoe_composition(rules.decks, tuple(player_hand.cards) + (dealer_card,))
+            except ValueError as error:
+                print(error)
+                continue
+            dealer_odds = dealer_outcome_probabilities(dealer_card, composition, rules.dealer_hits_soft_17)
+            print("DEALER: " + " | ".join(f"{outcome.upper()} {probability:.1%}" for outcome, probability in dealer_odds.items()))
             
             # Auto-execute if not busted
             if not player_hand.is_busted:
@@ -922,18 +3558,23 @@ def interactive_play_mode():
     print("=" * 50)
 
     rules = Rules()
-    strategy = BasicStrategy(rules)
+    counter = CardCounter(rules.decks)
+    strategy = CountingStrategy(rules, counter)
 
     base_bet = get_integer_input("Enter your base bet amount (R10-R100): ", 10, 100)
     if base_bet == -1:
         return
 
-    game = BlackjackGame(rules, strategy, base_bet)
+    game = BlackjackGame(rules, strategy, base_bet, counter=counter)
 
     while game.bankroll > 0:
-        print(f"\nBankroll: R{game.bankroll}")
+        # Reshuffle now if the cut card is out, so the count shown for the bet is the new shoe's
+        game._shuffle_between_rounds()
+        print(f"\nBankroll: {format_money(game.bankroll)}")
+        print(f"Count: {game.counter}")
 
-        bet = get_integer_input(f"Enter your bet (min R{base_bet}, max R{min(game.bankroll, 1000)}): ", base_bet, min(game.bankroll, 1000))
+        max_bet = int(min(game.bankroll, 1000))
+        bet = get_integer_input(f"Enter your bet (min R{base_bet}, max R{max_bet}): ", base_bet, max_bet)
         if bet == -1:
             break
 
@@ -943,14 +3584,24 @@ def interactive_play_mode():
         print(f"\nDealer shows: {game.dealer_hand.cards[0]}")
         
         # Educational note about insurance when dealer shows Ace
-        if game.dealer_hand.cards[0] == 'A':
+        if game.insurance_offered():
             print(f"\n💡 NOTE: Dealer shows Ace")
-            print("Insurance is available but NOT recommended - it's a side bet with ~7% house edge")
-            print("Basic strategy: Never take insurance")
+            if strategy.take_insurance():
+                print(f"Count says TAKE insurance ({counter}, index +{INSURANCE_INDEX})")
+            else:
+                print("Insurance is available but NOT recommended - it's a side bet with ~7% house edge")
+                print("Basic strategy: Never take insurance")
+            offer = "Take even money?" if game.player_hands[0].is_blackjack else f"Take insurance for {format_money(bet / 2)}?"
+            if input(f"{offer} (Y/N): ").strip().upper() == 'Y':
+                game.take_insurance()
         
-        # Check for dealer blackjack
+        # Check for dealer blackjack, revealed only once insurance is settled
         if game.dealer_hand.is_blackjack:
             print("Dealer has Blackjack!")
+            if game.even_money:
+                print("You took even money on your Blackjack.")
+            else:
+                print("You also have Blackjack! It's a push." if game.player_hands[0].is_blackjack else "You lose this hand.")
             result = game.complete_round()
             game.bankroll += result
             game.hands_played += 1
@@ -971,10 +3622,17 @@ def interactive_play_mode():
                 print("Hand busted!")
                 i += 1
                 continue
+            elif hand.stood:
+                print("Split aces receive one card.")
+                i += 1
+                continue
 
             # Get strategy recommendation
             recommendation = strategy.get_recommendation(hand, game.dealer_hand.cards[0])
+            basic_recommendation = strategy.base.get_recommendation(hand, game.dealer_hand.cards[0])
             print(f"Strategy recommendation: {recommendation.value}")
+            if recommendation != basic_recommendation:
+                print(f"  Index play at {counter} (basic strategy: {basic_recommendation.value})")
             
             # Add explanation for complex decisions
             if recommendation == Action.DOUBLE and len(hand.cards) > 2:
@@ -983,7 +3641,8 @@ def interactive_play_mode():
                 print("  Note: Cannot split non-pairs. Recommend Hit instead.")
             
             # Get player action
-            action = get_action_input("Enter action (H: Hit, ST: Stand, D: Double, SP: Split): ")
+            surrender_option = ", SU: Surrender" if game.can_surrender(hand) else ""
+            action = get_action_input(f"Enter action (H: Hit, ST: Stand, D: Double, SP: Split{surrender_option}): ")
             if action is None:
                 break
 
@@ -1008,8 +3667,8 @@ def interactive_play_mode():
         game.bankroll += result
         game.hands_played += 1
 
-        print(f"\nRound result: {'+' if result > 0 else ''}{result}")
-        print(f"New bankroll: R{game.bankroll}")
+        print(f"\nRound result: {'+' if result > 0 else '-' if result < 0 else ''}{format_money(abs(result))}")
+        print(f"New bankroll: {format_money(game.bankroll)}")
 
         if game.bankroll <= 0:
             print("You're out of money!")
@@ -1019,7 +3678,7 @@ def interactive_play_mode():
         if continue_playing != 'Y':
             break
 
-    print(f"\nGame over! Final bankroll: R{game.bankroll}")
+    print(f"\nGame over! Final bankroll: {format_money(game.bankroll)}")
     print(f"Hands played: {game.hands_played}")
     input("\nPress Enter to return to menu...")
     clear_console()
@@ -1048,11 +3707,350 @@ def main_menu():
             print("Invalid choice. Please select 1, 2, or 3.")
             input("Press Enter to continue...")  # Brief pause before clearing again
 
-def main():
+def play_interactive():
     clear_console()
     print("Welcome to Blackjack Strategy Helper!")
     input("Press Enter to continue...")
     main_menu()
 
+def _payout(text: str) -> float:
+    """Blackjack payout as a ratio ('3:2', '6:5') or a number ('1.5')"""
+    if ':' in text:
+        win, stake = text.split(':')
+        if int(stake) == 0:
+            raise ValueError("payout stake must not be 0")
+        return int(win) / int(stake)
+    return float(text)
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        import argparse
+
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {text!r}")
+    return value
+
+def _flag(text: str) -> bool:
+    if text.lower() in ('1', 'y', 'yes', 'true', 'on'):
+        return True
+    if text.lower() in ('0', 'n', 'no', 'false', 'off'):
+        return False
+    import argparse
+
+    raise argparse.ArgumentTypeError(f"expected 0/1, got {text!r}")
+
+def add_sweep_arguments(parser: 'argparse.ArgumentParser'):
+    grid = parser.add_argument_group('rule grid (every combination is one cell)')
+    grid.add_argument('--decks', type=int, nargs='+', default=[6])
+    grid.add_argument('--h17', type=_flag, nargs='+', default=[False], help="dealer hits soft 17 (0/1)")
+    grid.add_argument('--das', type=_flag, nargs='+', default=[True], help="double after split (0/1)")
+    grid.add_argument('--payout', type=_payout, nargs='+', default=[1.5], help="blackjack payout, e.g. 3:2 6:5")
+    grid.add_argument('--penetration', type=float, nargs='+', default=[0.75])
+    grid.add_argument('--surrender', choices=SURRENDER_RULES, nargs='+', default=['none'])
+    parser.add_argument('--target-ci', type=float, default=0.002, help="stop a cell once its 95%% CI is this wide (edge per bet)")
+    parser.add_argument('--batch', type=int, default=100_000, help="hands between convergence checks")
+    parser.add_argument('--min-hands', type=int, default=200_000)
+    parser.add_argument('--max-hands', type=int, default=20_000_000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', '-o', default=None, help="CSV file for the results (default: table on stdout)")
+    parser.set_defaults(validate=lambda args: sweep_cells(sweep_grid(args)))
+
+def sweep_grid(args: 'argparse.Namespace') -> Dict[str, list]:
+    return {
+        'decks': args.decks,
+        'dealer_hits_soft_17': args.h17,
+        'double_after_split': args.das,
+        'blackjack_pays': args.payout,
+        'penetration': args.penetration,
+        'surrender': args.surrender,
+    }
+
+def run_sweep(args: 'argparse.Namespace'):
+    grid = sweep_grid(args)
+    cells = len(sweep_cells(grid))
+    done = []
+
+    def progress(row):
+        done.append(row)
+        print(f"[{len(done)}/{cells}] {row['hands']} hands, edge {row['house_edge'] * 100:+.3f}%", file=sys.stderr)
+
+    rows = sweep(
+        grid,
+        target_ci=args.target_ci,
+        batch_hands=args.batch,
+        min_hands=args.min_hands,
+        max_hands=args.max_hands,
+        seed=args.seed,
+        workers=args.workers,
+        progress=progress,
+    )
+    write_sweep_table(rows, args.output)
+
+def add_serve_arguments(parser: 'argparse.ArgumentParser'):
+    parser.add_argument('--host', default=ADVICE_SERVER_HOST, help=f"interface to bind (default {ADVICE_SERVER_HOST})")
+    parser.add_argument('--port', type=int, default=ADVICE_SERVER_PORT, help=f"port to listen on (default {ADVICE_SERVER_PORT})")
+    parser.add_argument('--workers', type=int, help="simulation job processes (default: one per CPU)")
+
+STRATEGY_CLASSES = {
+    'basic': BasicStrategy,
+    'compiled': CompiledStrategy,
+    'solved': SolvedStrategy,
+    'exact': ExactStrategy,
+}
+
+ACTION_BY_CODE = {action.value: action for action in Action}
+ADVICE_CHUNK_LINES = 8192  # hands read, looked up and written together
+ADVICE_CACHE_LINES = 100_000  # distinct input lines remembered before the cache starts over
+
+def add_rules_arguments(parser: 'argparse.ArgumentParser'):
+    rules = parser.add_argument_group('rules')
+    rules.add_argument('--decks', type=int, default=6)
+    rules.add_argument('--h17', type=_flag, default=False, help="dealer hits soft 17 (0/1)")
+    rules.add_argument('--das', type=_flag, default=True, help="double after split (0/1)")
+    rules.add_argument('--payout', type=_payout, default=1.5, help="blackjack payout, e.g. 3:2 or 6:5")
+    rules.add_argument('--penetration', type=float, default=0.75)
+    rules.add_argument('--double-on', choices=list(DOUBLE_ON_TOTALS), default='any')
+    rules.add_argument('--surrender', choices=SURRENDER_RULES, default='none')
+    parser.add_argument('--strategy', choices=list(STRATEGY_CLASSES), default='compiled')
+    parser.set_defaults(validate=rules_from_args)
+
+def rules_from_args(args: 'argparse.Namespace') -> Rules:
+    """Rules from the shared rule options, checked like the server's JSON rules"""
+    return rules_from_dict({
+        'decks': args.decks,
+        'dealer_hits_soft_17': args.h17,
+        'double_after_split': args.das,
+        'blackjack_pays': args.payout,
+        'penetration': args.penetration,
+        'double_on': args.double_on,
+        'surrender': args.surrender,
+    })
+
+def parse_advice_line(line: str, decks: Optional[int] = None) -> Optional[Tuple[List[str], str, Optional[Action]]]:
+    """(player cards, dealer upcard, decision taken) from one input line
+
+    Lines list the player's cards then the upcard, separated by spaces or
+    commas with an optional 'vs' ('A,6 5', '10 6 vs 10'), and may end with
+    the action actually taken ('10 6 10 ST') to grade it. Blank lines and
+    '#' comments give None. With decks, a line that needs more of a rank than
+    that shoe holds is invalid too.
+    """
+    tokens = line.replace(',', ' ').upper().split()
+    if not tokens or tokens[0].startswith('#'):
+        return None
+    decision = ACTION_BY_CODE.get(tokens[-1])
+    if decision is not None:
+        tokens.pop()
+    if 'VS' in tokens:
+        tokens.remove('VS')
+    if len(tokens) < 3:
+        raise ValueError("expected at least two player cards and a dealer upcard")
+    for card in tokens:
+        if card not in CARD_VALUE_INDEX:
+            raise ValueError(f"invalid card {card!r}")
+    if decks is not None:
+        shoe_composition(decks, tuple(tokens))
+    return tokens[:-1], tokens[-1], decision
+
+def _open_output(path: Optional[str]):
+    return open(path, 'w', newline='') if path and path != '-' else sys.stdout
+
+def _advice_row(cards: List[str], upcard: str, decision: Optional[Action], action: Action, evs: Optional[Dict[Action, float]], jsonl: bool) -> str:
+    if jsonl:
+        import json
+
+        row = {'player': cards, 'upcard': upcard, 'action': action.value}
+        if decision is not None:
+            row.update(decision=decision.value, correct=decision is action)
+        if evs is not None:
+            row['evs'] = {option.value: ev for option, ev in evs.items()}
+        return json.dumps(row) + '\n'
+    fields = [' '.join(cards), upcard, action.value, decision.value if decision else '', '' if decision is None else str(int(decision is action))]
+    if evs is not None:
+        fields += [repr(evs[option]) if option in evs else '' for option in Action]
+    return ','.join(fields) + '\n'
+
+def run_advise(args: 'argparse.Namespace') -> int:
+    rules = rules_from_args(args)
+    advisor = BatchAdvisor(rules, STRATEGY_CLASSES[args.strategy](rules))
+    jsonl = args.format == 'jsonl'
+    out = _open_output(args.output)
+    if not jsonl:
+        columns = ['player', 'upcard', 'action', 'decision', 'correct']
+        out.write(','.join(columns + [f"ev_{action.value}" for action in Action] if args.ev else columns) + '\n')
+
+    # Real decision logs repeat the same few thousand lines, so every distinct
+    # line is parsed and looked up once: input line -> (output row, graded, correct),
+    # None for blank/comment lines or the ValueError for an invalid one
+    answers: Dict[str, object] = {}
+    hands = graded = correct = invalid = 0
+    try:
+        for path in args.inputs or ['-']:
+            source = sys.stdin if path == '-' else open(path)
+            try:
+                lines = enumerate(source, 1)
+                while True:
+                    chunk = list(islice(lines, ADVICE_CHUNK_LINES))
+                    if not chunk:
+                        break
+                    if len(answers) > ADVICE_CACHE_LINES:
+                        answers.clear()
+
+                    pending: Dict[str, tuple] = {}
+                    for _, line in chunk:
+                        if line in answers or line in pending:
+                            continue
+                        try:
+                            query = parse_advice_line(line, rules.decks)
+                        except ValueError as error:
+                            answers[line] = error
+                            continue
+                        if query is None:
+                            answers[line] = None
+                        else:
+                            pending[line] = query
+                    if pending:
+                        queries = list(pending.values())
+                        actions, evs = advisor.advise([q[0] for q in queries], [q[1] for q in queries], args.ev)
+                        for index, (line, (cards, upcard, decision)) in enumerate(pending.items()):
+                            action = actions[index]
+                            row = _advice_row(cards, upcard, decision, action, evs[index] if evs else None, jsonl)
+                            answers[line] = (row, decision is not None, decision is action)
+
+                    rows = []
+                    for number, line in chunk:
+                        answer = answers[line]
+                        if answer is None:
+                            continue
+                        if isinstance(answer, ValueError):
+                            invalid += 1
+                            print(f"{path}:{number}: {answer}", file=sys.stderr)
+                            continue
+                        rows.append(answer[0])
+                        graded += answer[1]
+                        correct += answer[2]
+                    out.write(''.join(rows))
+                    hands += len(rows)
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    summary = f"{hands} hands advised"
+    if graded:
+        summary += f", {correct}/{graded} decisions correct ({correct / graded:.2%})"
+    if invalid:
+        summary += f", {invalid} invalid lines skipped"
+    print(summary, file=sys.stderr)
+    return 1 if invalid else 0
+
+def run_simulate(args: 'argparse.Namespace') -> int:
+    rules = rules_from_args(args)
+    strategy = STRATEGY_CLASSES[args.strategy](rules)
+    if args.workers == 1:
+        stats = simulate(rules, strategy, args.hands, seed=args.seed, bet=args.bet)
+    else:
+        stats = simulate_parallel(rules, strategy, args.hands, seed=args.seed, bet=args.bet, workers=args.workers)
+    import json
+
+    out = _open_output(args.output)
+    out.write(json.dumps(simulation_summary(stats)) + '\n')
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+def run_replay(args: 'argparse.Namespace') -> int:
+    rules = rules_from_args(args)
+    if args.record:
+        save_shoes(args.shoes, record_shoes(rules, args.record, args.seed))
+        print(f"Recorded {args.record} shoes to {args.shoes}", file=sys.stderr)
+        return 0
+
+    strategies = {name: STRATEGY_CLASSES[name](rules) for name in args.strategies}
+    try:
+        results = replay(rules, strategies, load_shoes(args.shoes), args.hands, bet=args.bet)
+    except ValueError as error:
+        print(f"replay: {error}", file=sys.stderr)
+        return 1
+    import json
+
+    out = _open_output(args.output)
+    for name, stats in results.items():
+        out.write(json.dumps({'strategy': name, **simulation_summary(stats)}) + '\n')
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+def build_parser() -> 'argparse.ArgumentParser':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='black_jack.py',
+        description="Blackjack strategy helper. Without a command it starts the interactive menu.",
+    )
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    advise = commands.add_parser('advise', help="recommend an action for every hand read from files or stdin")
+    advise.add_argument('inputs', nargs='*', help="files of hands, one per line ('A,6 5', '10 6 vs 10 ST'); '-' or none reads stdin")
+    advise.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    advise.add_argument('--ev', action='store_true', help="include the EV of every action (solver; much slower)")
+    advise.add_argument('--output', '-o', help="output file (default: stdout)")
+    add_rules_arguments(advise)
+    advise.set_defaults(run=run_advise)
+
+    simulation = commands.add_parser('simulate', help="play hands silently and print the results as JSON")
+    simulation.add_argument('--hands', type=int, default=100_000)
+    simulation.add_argument('--seed', type=int)
+    simulation.add_argument('--bet', type=_positive_int, default=10)
+    simulation.add_argument('--workers', type=int, default=1, help="processes to shard the run across (0: one per CPU)")
+    simulation.add_argument('--output', '-o', help="output file (default: stdout)")
+    add_rules_arguments(simulation)
+    simulation.set_defaults(run=run_simulate)
+
+    replaying = commands.add_parser('replay', help="record shoes, or replay them against several strategies")
+    replaying.add_argument('shoes', help="recorded shoe file")
+    replaying.add_argument('--record', type=int, metavar='N', help="record N shoes to the file instead of replaying")
+    replaying.add_argument('--strategies', choices=list(STRATEGY_CLASSES), nargs='+', default=['basic', 'compiled'])
+    replaying.add_argument('--hands', type=int, default=100_000)
+    replaying.add_argument('--seed', type=int)
+    replaying.add_argument('--bet', type=_positive_int, default=10)
+    replaying.add_argument('--output', '-o', help="output file (default: stdout)")
+    add_rules_arguments(replaying)
+    replaying.set_defaults(run=run_replay)
+
+    sweeping = commands.add_parser('sweep', help="house edge over a grid of rule variants")
+    add_sweep_arguments(sweeping)
+    sweeping.set_defaults(run=run_sweep)
+
+    serving = commands.add_parser('serve', help="local HTTP/JSON advice server")
+    add_serve_arguments(serving)
+    serving.set_defaults(run=lambda args: serve(args.host, args.port, args.workers))
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        play_interactive()
+        return
+    # Commands that take rule options check them up front, so bad values are usage errors
+    validate = getattr(args, 'validate', None)
+    if validate is not None:
+        try:
+            validate(args)
+        except ValueError as error:
+            parser.error(f"{args.command}: {error}")
+    try:
+        sys.exit(args.run(args) or 0)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`: stop quietly instead of failing again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
+
 if __name__ == "__main__":
     main()
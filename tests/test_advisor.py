@@ -0,0 +1,80 @@
+"""Query validation for BatchAdvisor and the advice server"""
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from black_jack import AdviceServer, BatchAdvisor, Rules, shoe_composition
+
+
+def test_shoe_composition_rejects_more_cards_than_the_shoe_holds():
+    assert shoe_composition(1, ('A',) * 4)[-1] == 0
+    with pytest.raises(ValueError):
+        shoe_composition(1, ('A',) * 5)
+
+
+@pytest.mark.parametrize("method", ['recommend', 'evaluate'])
+def test_advisor_rejects_impossible_hands(method):
+    advisor = BatchAdvisor(Rules(decks=1))
+    with pytest.raises(ValueError, match="Query 0"):
+        getattr(advisor, method)([['A', 'A', 'A', 'A', 'A']], ['2'])
+    with pytest.raises(ValueError, match="Query 0"):
+        getattr(advisor, method)([['A', 'A', 'A', 'A']], ['A'])
+
+
+async def post(port, path, document):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(document).encode()
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+def test_server_answers_400_for_hands_the_shoe_cannot_deal():
+    async def run():
+        server = AdviceServer(port=0, workers=1)
+        port = await server.start()
+        try:
+            query = {'hands': [['A', 'A', 'A', 'A', 'A']], 'upcards': ['A'], 'rules': {'decks': 1}}
+            return await post(port, '/recommend', query), await post(port, '/ev', query)
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == (400, 400)
+
+
+@pytest.mark.parametrize("field", ['hands', 'seed', 'bet'])
+def test_server_rejects_json_booleans_for_simulation_numbers(field):
+    async def run():
+        server = AdviceServer(port=0, workers=1)
+        port = await server.start()
+        try:
+            return await post(port, '/simulate', {'hands': 1000, field: True})
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == 400
+
+
+def test_server_restarts_a_broken_simulation_pool():
+    async def run():
+        server = AdviceServer(port=0, workers=1)
+        port = await server.start()
+        try:
+            broken = server._pool
+            # A worker that dies outright breaks the whole pool
+            with pytest.raises(BrokenProcessPool):
+                await asyncio.wrap_future(broken.submit(os._exit, 1))
+            first = await post(port, '/simulate', {'hands': 100, 'seed': 1})
+            second = await post(port, '/simulate', {'hands': 100, 'seed': 1})
+            return first, second, server._pool is not broken
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == (503, 202, True)
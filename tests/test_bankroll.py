@@ -0,0 +1,35 @@
+"""Bankroll trajectories: step accounting and ruin (needs NumPy)"""
+import pytest
+
+from black_jack import simulate_bankroll
+
+np = pytest.importorskip("numpy")
+
+
+def test_every_round_moves_the_bankroll_by_its_result_in_bets():
+    # Chunks that do not divide the run must still add up round by round
+    analysis = simulate_bankroll({1: 1.0}, 100, 30, paths=4, bet=10, seed=1, samples=3, chunk_rounds=7)
+    assert analysis.rounds.tolist() == [0, 10, 20, 30]
+    assert analysis.median.tolist() == [100, 200, 300, 400]
+    assert analysis.final.tolist() == [400] * 4
+    assert analysis.risk_of_ruin == 0
+
+
+def test_a_path_is_ruined_on_the_round_it_cannot_cover_a_bet_and_stays_there():
+    analysis = simulate_bankroll({-0.5: 1.0}, 100, 30, paths=3, bet=10, seed=1, samples=3)
+    # 100 loses 5 a round: 10 after 18 rounds, below one bet on round 19
+    assert analysis.ruin_round.tolist() == [19] * 3
+    assert analysis.final.tolist() == [5] * 3
+    assert analysis.risk_of_ruin == 1
+
+
+def test_runs_are_reproducible_for_a_seed():
+    outcomes = {-1: 0.49, 0: 0.08, 1: 0.43}
+
+    def run():
+        return simulate_bankroll(outcomes, 200, 500, paths=200, bet=10, seed=7)
+
+    first, second = run(), run()
+    assert first.final.tolist() == second.final.tolist()
+    assert first.ruin_round.tolist() == second.ruin_round.tolist()
+    assert 0 < first.risk_of_ruin < 1
@@ -0,0 +1,43 @@
+"""Command-line entry points: output and error paths"""
+import pytest
+
+from black_jack import main
+
+
+def run_cli(argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    captured = capsys.readouterr()
+    return exit_info.value.code, captured.out, captured.err
+
+
+def test_advise_reports_impossible_hands_per_line_and_keeps_going(tmp_path, capsys):
+    hands = tmp_path / "hands.txt"
+    hands.write_text("10 6 10\nA A A A A 5\nA 6 5\n")
+    status, out, err = run_cli(['advise', str(hands), '--decks', '1'], capsys)
+    assert status == 1
+    assert out.splitlines()[1:] == ['10 6,10,H,,', 'A 6,5,D,,']
+    assert f"{hands}:2:" in err
+    assert "2 hands advised, 1 invalid lines skipped" in err
+
+
+@pytest.mark.parametrize("argv", [
+    ['advise', '--decks', '0'],
+    ['simulate', '--decks', '0'],
+    ['simulate', '--penetration', '-0.5'],
+    ['simulate', '--payout', '1:0'],
+    ['simulate', '--bet', '0'],
+    ['replay', 'shoes.bin', '--penetration', '2'],
+    ['sweep', '--decks', '6', '9'],
+])
+def test_bad_rule_options_are_usage_errors(argv, capsys):
+    status, out, err = run_cli(argv, capsys)
+    assert status == 2
+    assert out == ''
+    assert 'error:' in err and 'Traceback' not in err
+
+
+def test_simulate_prints_a_json_summary(capsys):
+    status, out, _ = run_cli(['simulate', '--hands', '200', '--seed', '1', '--payout', '6:5'], capsys)
+    assert status == 0
+    assert '"hands": 200' in out
@@ -0,0 +1,58 @@
+"""Card counting, bet ramps and index plays"""
+import random
+
+import pytest
+
+import black_jack
+
+from black_jack import (
+    FAB_4, Action, BasicStrategy, BetRamp, BlackjackGame, CardCounter, CompiledStrategy, CountingStrategy, Hand, Rules,
+)
+
+
+def test_first_bet_of_a_fresh_shoe_uses_the_reset_count():
+    rules = Rules()
+    counter = CardCounter(rules.decks)
+    game = BlackjackGame(rules, BasicStrategy(rules), 10, rng=random.Random(1), verbose=False, counter=counter, bet_ramp=BetRamp())
+
+    # End of a hot shoe: past the cut card with a high count
+    game.shoe_position = game.cut_card + 1
+    counter.running_count = 40
+    counter.cards_seen = game.shoe_position
+    assert game.bet_ramp.bet(counter.true_count, 10) > 10
+
+    game.start_new_hand(10)
+    assert game.round_bet == 10
+
+
+@pytest.mark.parametrize("true_count", [-4, 0, 4])
+@pytest.mark.parametrize("cards, upcard", [(['10', '4'], '10'), (['10', '5'], '10'), (['10', '5'], '9'), (['10', '5'], 'A')])
+def test_fab_4_only_applies_under_late_surrender(true_count, cards, upcard):
+    for surrender in ('late', 'early'):
+        rules = Rules(surrender=surrender)
+        counter = CardCounter(rules.decks)
+        counter.running_count = true_count * rules.decks
+        strategy = CountingStrategy(rules, counter)
+        action = strategy.get_recommendation(Hand(cards), upcard)
+        if surrender == 'late':
+            index = next(index for _, total, up, index, _, _ in FAB_4 if (total, up) == (10 + int(cards[1]), upcard))
+            assert (action == Action.SURRENDER) == (true_count >= index)
+        else:
+            assert (action == Action.SURRENDER) == (CompiledStrategy(rules).get_recommendation(Hand(cards), upcard) == Action.SURRENDER)
+
+
+def test_interactive_play_shows_the_new_shoe_count_before_the_bet(monkeypatch, capsys):
+    original_init = BlackjackGame.__init__
+
+    def hot_shoe_past_the_cut_card(game, *args, **kwargs):
+        original_init(game, *args, **kwargs)
+        game.shoe_position = game.cut_card + 1
+        game.counter.running_count = 40
+        game.counter.cards_seen = game.shoe_position
+
+    monkeypatch.setattr(BlackjackGame, '__init__', hot_shoe_past_the_cut_card)
+    monkeypatch.setattr(black_jack, 'clear_console', lambda: None)
+    answers = iter(['10', 'BACK', ''])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    black_jack.interactive_play_mode()
+    assert "Count: RC +0 | TC +0.0" in capsys.readouterr().out
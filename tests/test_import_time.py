@@ -0,0 +1,52 @@
+"""Cold-start budget for `import black_jack`
+
+The advisor is run as a short-lived subprocess by other tools, so importing
+the module and answering one recommendation must stay cheap. These tests run
+a fresh interpreter with `python -X importtime` and fail when the module's
+cumulative import time exceeds IMPORT_BUDGET_US, or when the cold path pulls
+in a subsystem that is meant to load lazily.
+"""
+import os
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_BUDGET_US = 40_000  # about 2-3x the import time on a typical laptop
+RUNS = 5
+
+LAZY_MODULES = ('asyncio', 'argparse', 'concurrent.futures', 'csv', 'hashlib', 'json', 'multiprocessing', 'numpy')
+
+COLD_START = (
+    "import sys; import black_jack as bj; "
+    "print(bj.BasicStrategy(bj.Rules()).get_recommendation(bj.Hand(['A', '6']), '5').value); "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=REPO, capture_output=True, text=True, check=True)
+
+
+def import_time_us():
+    """Cumulative microseconds for black_jack in one `-X importtime` run"""
+    stderr = run_python('-X', 'importtime', '-c', 'import black_jack').stderr
+    for line in stderr.splitlines():
+        self_us, cumulative_us, name = line.split('|')
+        if name.strip() == 'black_jack':
+            return int(cumulative_us)
+    raise AssertionError("black_jack missing from -X importtime output")
+
+
+def test_import_time_budget():
+    # Write the bytecode cache explicitly (PYTHONDONTWRITEBYTECODE may be set),
+    # so the timed runs measure the import rather than compiling the source
+    run_python('-m', 'py_compile', 'black_jack.py')
+    best = min(import_time_us() for _ in range(RUNS))
+    assert best <= IMPORT_BUDGET_US, f"import black_jack took {best}us (budget {IMPORT_BUDGET_US}us)"
+
+
+def test_cold_recommendation_loads_no_heavy_modules():
+    action, loaded = run_python('-c', COLD_START).stdout.splitlines()
+    assert action == 'D'
+    assert loaded == '', f"imported eagerly: {loaded}"
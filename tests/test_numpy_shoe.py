@@ -0,0 +1,51 @@
+"""Bounds and reshuffling of the vectorized shoe"""
+import pytest
+
+from black_jack import CARD_RANKS, CompiledStrategy, NumpyShoe, Rules, simulate_lockstep, simulation_summary
+
+np = pytest.importorskip("numpy")
+
+
+def test_dealing_past_the_end_of_a_shoe_raises():
+    shoe = NumpyShoe(Rules(decks=1), tables=3, seed=1)
+    dealt = shoe.deal_many(50)
+    assert dealt.shape == (3, 50)
+    shoe.deal()
+    shoe.deal(np.array([True, False, True]))
+    with pytest.raises(ValueError):
+        shoe.deal_many(2)
+    with pytest.raises(ValueError):
+        shoe.deal(np.array([True, False, False]))
+    assert shoe.deal(np.array([False, True, False])).tolist() == [-1, shoe.cards[1, 51], -1]
+
+
+def test_reshuffle_low_refills_only_the_short_shoes():
+    shoe = NumpyShoe(Rules(decks=1), tables=2, seed=1)
+    shoe.deal_many(10)
+    shoe.deal_many(29)
+    shoe.deal(np.array([True, False]))
+    assert shoe.reshuffle_low().tolist() == [True, False]
+    assert shoe.remaining.tolist() == [shoe.size, shoe.size - 39]
+    assert sorted(shoe.cards[0].tolist()) == sorted(shoe.cards[1].tolist())
+
+
+def test_game_takes_whole_shuffled_shoes_from_its_row():
+    rules = Rules(decks=2)
+    shoe = NumpyShoe(rules, tables=3, seed=1)
+    sources = [shoe.source(table) for table in range(3)]
+    first = [source.next_shoe() for source in sources]
+    assert all(sorted(cards) == sorted(CARD_RANKS * 8) for cards in first)
+
+    # A second shoe for table 0 reshuffles every taken row at once
+    second = sources[0].next_shoe()
+    assert sorted(second) == sorted(CARD_RANKS * 8) and second != first[0]
+    assert sources[1].next_shoe() != first[1]
+
+
+def test_lockstep_simulation_is_reproducible_and_plays_every_table():
+    rules = Rules(continuous_shuffle=True)
+    strategy = CompiledStrategy(rules)
+    stats = simulate_lockstep(rules, strategy, 200, tables=8, seed=3)
+    assert stats.total_hands == 1600
+    assert simulation_summary(stats) == simulation_summary(simulate_lockstep(rules, strategy, 200, tables=8, seed=3))
+    assert -0.2 < stats.ev < 0.2
@@ -0,0 +1,113 @@
+"""Behavioural checks for the rules engine in black_jack.py"""
+import random
+
+import pytest
+
+from black_jack import (
+    Action, BasicStrategy, BlackjackGame, CompiledStrategy, Hand, Rules, StrategySolver, rules_from_dict, simulate,
+)
+
+
+def quiet_game(rules, seed=1):
+    return BlackjackGame(rules, BasicStrategy(rules), rng=random.Random(seed), verbose=False)
+
+
+@pytest.mark.parametrize("payout, expected", [(1.5, 15), (1.2, 12)])
+@pytest.mark.parametrize("dealer_cards", [['10', '6', '9'], ['10', '7'], ['9', '8', '3']])
+def test_blackjack_pays_the_rules_ratio_whatever_the_dealer_makes(payout, expected, dealer_cards):
+    game = quiet_game(Rules(blackjack_pays=payout))
+    assert game._determine_winner(Hand(['A', 'K'], 10), Hand(dealer_cards)) == expected
+
+
+@pytest.mark.parametrize("bet", [1, 5, 7])
+@pytest.mark.parametrize("payout", [1.5, 1.2])
+def test_surrender_and_blackjack_settle_exactly_for_small_and_odd_bets(bet, payout):
+    game = quiet_game(Rules(blackjack_pays=payout, surrender='late'))
+    hand = Hand(['10', '6'], bet)
+    hand.surrender()
+    assert game._determine_winner(hand, Hand(['10', '7'])) == -bet / 2
+    assert game._determine_winner(Hand(['A', 'K'], bet), Hand(['10', '7'])) == pytest.approx(bet * payout)
+
+
+def test_blackjack_pushes_a_dealer_blackjack():
+    game = quiet_game(Rules())
+    assert game._determine_winner(Hand(['A', 'K'], 10), Hand(['A', 'Q'])) == 0
+
+
+def test_dealer_does_not_draw_when_no_live_hand_is_left():
+    game = quiet_game(Rules())
+    game.start_new_hand(10)
+    game.player_hands = [Hand(['A', 'K'], 10)]
+    game.dealer_hand = Hand(['10', '2'])
+    assert game.complete_round() == 15
+    assert game.dealer_hand.cards == ['10', '2']
+
+    game.start_new_hand(10)
+    game.player_hands = [Hand(['10', '6', 'K'], 10)]
+    game.dealer_hand = Hand(['10', '2'])
+    assert game.complete_round() == -10
+    assert game.dealer_hand.cards == ['10', '2']
+
+
+def test_simulated_naturals_are_paid_three_to_two():
+    rules = Rules()
+    stats = simulate(rules, CompiledStrategy(rules), 50_000, seed=1)
+    # About 4.5% of rounds are a player natural without a dealer natural
+    assert 0.04 < stats.outcomes[15] / stats.total_hands < 0.05
+
+
+def rigged_game(rules, cards):
+    """A game whose next draws are exactly cards, with the player holding a pair of aces vs a 6"""
+    game = quiet_game(rules)
+    game.start_new_hand(10)
+    game.player_hands = [Hand(['A', 'A'], 10)]
+    game.dealer_hand = Hand(['6', '10'])
+    draws = iter(cards)
+    game._draw_card = lambda visible=True: next(draws)
+    return game
+
+
+@pytest.mark.parametrize("resplit_aces, hands", [(False, 2), (True, 3)])
+def test_split_aces_that_draw_an_ace_are_resplit_only_when_allowed(resplit_aces, hands):
+    rules = Rules(resplit_aces=resplit_aces)
+    game = rigged_game(rules, ['A', '5', '9', '7'])
+    game._play_hands(BasicStrategy(rules))
+    assert len(game.player_hands) == hands
+    assert all(hand.stood and len(hand.cards) == 2 for hand in game.player_hands)
+
+
+@pytest.mark.parametrize("double_after_split", [False, True])
+@pytest.mark.parametrize("double_split_aces", [False, True])
+@pytest.mark.parametrize("hit_split_aces", [False, True])
+def test_game_and_solver_agree_on_doubling_split_aces(double_after_split, double_split_aces, hit_split_aces):
+    rules = Rules(double_after_split=double_after_split, double_split_aces=double_split_aces, hit_split_aces=hit_split_aces)
+    hand = Hand.split_from('A', '9', 10)
+    offered = Action.DOUBLE in StrategySolver(rules).evaluate(hand, '6')
+    assert offered == quiet_game(rules).can_double(hand)
+    assert offered == (double_after_split and double_split_aces and hit_split_aces)
+
+
+@pytest.mark.parametrize("fields", [
+    {'penetration': 'abc'},
+    {'penetration': 0},
+    {'penetration': 1.5},
+    {'blackjack_pays': -1},
+    {'blackjack_pays': '3:2'},
+    {'decks': True},
+    {'decks': 2.0},
+    {'decks': 9},
+    {'max_split_hands': 0},
+    {'dealer_hits_soft_17': 1},
+    {'insurance': 'yes'},
+    {'double_on': ['any']},
+    {'surrender': 'sometimes'},
+])
+def test_rules_from_dict_rejects_bad_values(fields):
+    with pytest.raises(ValueError):
+        rules_from_dict(fields)
+
+
+def test_rules_from_dict_keeps_defaults_and_accepts_valid_values():
+    assert rules_from_dict({}).decks == Rules().decks
+    rules = rules_from_dict({'decks': 2, 'penetration': 1, 'blackjack_pays': 1.2, 'dealer_hits_soft_17': True, 'surrender': 'late'})
+    assert (rules.decks, rules.penetration, rules.blackjack_pays, rules.dealer_hits_soft_17) == (2, 1, 1.2, True)
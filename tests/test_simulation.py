@@ -0,0 +1,56 @@
+"""Reproducibility and recording checks for headless simulation"""
+import pytest
+
+from black_jack import (
+    BasicStrategy, CompiledStrategy, HandHistoryWriter, Rules,
+    load_shoes, read_hand_history, record_shoes, replay, save_shoes, simulate, simulate_parallel, simulation_summary,
+)
+
+
+def test_parallel_simulation_is_reproducible_for_a_seed_and_worker_count():
+    rules = Rules()
+    strategy = CompiledStrategy(rules)
+    first = simulate_parallel(rules, strategy, 20_000, seed=7, workers=2)
+    second = simulate_parallel(rules, strategy, 20_000, seed=7, workers=2)
+    assert simulation_summary(first) == simulation_summary(second)
+    assert first.total_hands == 20_000
+
+
+def test_hand_history_round_trip_preserves_the_net(tmp_path):
+    rules = Rules()
+    path = str(tmp_path / "run.bjh")
+    with HandHistoryWriter(path, chunk_rounds=500) as history:
+        stats = simulate(rules, CompiledStrategy(rules), 2_000, seed=3, events=history)
+
+    rounds = list(read_hand_history(path))
+    assert len(rounds) == stats.total_hands
+    assert sum(round_['result'] for round_ in rounds) == stats.net
+
+
+@pytest.mark.parametrize("rules", [Rules(surrender='late'), Rules(blackjack_pays=1.2, surrender='early')])
+def test_ev_does_not_depend_on_the_bet_size(rules):
+    strategy = CompiledStrategy(rules)
+    reference = simulate(rules, strategy, 20_000, seed=5, bet=10)
+    for bet in (1, 5, 7):
+        stats = simulate(rules, strategy, 20_000, seed=5, bet=bet)
+        assert stats.ev == pytest.approx(reference.ev)
+        assert stats.variance == pytest.approx(reference.variance)
+
+
+def test_replaying_recorded_shoes_reproduces_the_seeded_simulation(tmp_path):
+    rules = Rules()
+    path = str(tmp_path / "shoes.bin")
+    save_shoes(path, record_shoes(rules, 200, seed=9))
+    strategies = {'basic': BasicStrategy(rules), 'compiled': CompiledStrategy(rules)}
+    results = replay(rules, strategies, load_shoes(path), 3_000)
+
+    expected = simulation_summary(simulate(rules, BasicStrategy(rules), 3_000, seed=9))
+    # The compiled tables are the basic strategy chart, so both replay the same rounds exactly
+    assert simulation_summary(results['basic']) == expected
+    assert simulation_summary(results['compiled']) == expected
+
+
+def test_replay_reports_running_out_of_recorded_shoes():
+    rules = Rules()
+    with pytest.raises(ValueError, match="ran out of recorded shoes"):
+        replay(rules, {'basic': BasicStrategy(rules)}, record_shoes(rules, 2, seed=1), 3_000)
@@ -0,0 +1,77 @@
+"""Chart checks for the strategies in black_jack.py"""
+import pytest
+
+from black_jack import (
+    CARD_VALUE_INDEX, DOUBLE_ON_TOTALS, SURRENDER_RULES,
+    Action, BasicStrategy, BlackjackGame, CompiledStrategy, ExactStrategy, Hand, Rules, StrategySolver,
+    shoe_composition,
+)
+
+
+@pytest.mark.parametrize("surrender", SURRENDER_RULES)
+@pytest.mark.parametrize("double_on", list(DOUBLE_ON_TOTALS))
+@pytest.mark.parametrize("double_after_split", [False, True])
+@pytest.mark.parametrize("dealer_hits_soft_17", [False, True])
+def test_compiled_tables_match_basic_strategy(dealer_hits_soft_17, double_after_split, double_on, surrender):
+    rules = Rules(
+        dealer_hits_soft_17=dealer_hits_soft_17,
+        double_after_split=double_after_split,
+        double_on=double_on,
+        surrender=surrender,
+    )
+    assert CompiledStrategy(rules).verify() == []
+
+
+@pytest.mark.parametrize("pair, upcards_with_das, upcards_without_das", [
+    ('2', '234567', '4567'),
+    ('3', '234567', '4567'),
+    ('4', '56', ''),
+    ('6', '23456', '3456'),
+])
+def test_small_pairs_split_less_without_double_after_split(pair, upcards_with_das, upcards_without_das):
+    for das, upcards in ((True, upcards_with_das), (False, upcards_without_das)):
+        strategy = BasicStrategy(Rules(double_after_split=das))
+        split = ''.join(up for up in '23456789' if strategy.get_recommendation(Hand([pair, pair]), up).value == 'SP')
+        assert split == upcards
+
+
+@pytest.mark.parametrize("pair", ['8', 'A', '2'])
+def test_split_ev_without_resplits_is_two_independent_hands(pair):
+    rules = Rules(max_split_hands=2)
+    solver = StrategySolver(rules)
+    card_index = CARD_VALUE_INDEX[pair]
+    counts = shoe_composition(rules.decks, (pair, pair, '6'))
+    dealer = solver._dealer(CARD_VALUE_INDEX['6'], counts)
+    memo = {}
+    hand_evs = {
+        index: solver._split_hand_ev(card_index, index, drawn, dealer, memo)
+        for index, _, drawn in solver._draws(counts)
+    }
+    closed_form = 2 * sum(count * hand_evs[index] for index, count in enumerate(counts) if count) / sum(counts)
+    assert solver._split_ev(card_index, counts, dealer, memo) == pytest.approx(closed_form)
+    assert StrategySolver(Rules())._split_ev(card_index, counts, dealer, {}) >= closed_form - 1e-12
+
+
+def test_exact_strategy_stops_resplitting_at_the_hand_limit():
+    strategy = ExactStrategy(Rules(max_split_hands=3))
+    hand = Hand.split_from('8', '8', 10)
+    assert strategy.get_recommendation(hand, '6', hands=2) == Action.SPLIT
+    assert strategy.get_recommendation(hand, '6', hands=3) != Action.SPLIT
+
+
+def test_game_tells_the_strategy_how_many_hands_are_in_play():
+    class Recording(CompiledStrategy):
+        def get_recommendation(self, player_hand, dealer_card, ignore_pair=False, ignore_surrender=False, hands=1):
+            seen.append((tuple(player_hand.cards), hands))
+            return super().get_recommendation(player_hand, dealer_card, ignore_pair, ignore_surrender, hands)
+
+    seen = []
+    rules = Rules()
+    game = BlackjackGame(rules, Recording(rules), verbose=False)
+    game.start_new_hand(10)
+    game.player_hands = [Hand(['8', '8'], 10)]
+    game.dealer_hand = Hand(['6', '10'])
+    draws = iter(['8', '10', '10', '10'])
+    game._draw_card = lambda visible=True: next(draws)
+    game._play_hands(game.strategy)
+    assert seen[:3] == [(('8', '8'), 1), (('8', '8'), 2), (('8', '10'), 3)]
@@ -0,0 +1,27 @@
+"""Rule-variant sweeps: grid order and per-cell convergence"""
+from black_jack import sweep
+
+GRID = {'decks': [1, 6], 'blackjack_pays': [1.5, 1.2]}
+
+
+def run(**kwargs):
+    options = dict(batch_hands=500, min_hands=1_000, max_hands=3_000, seed=1, workers=2)
+    options.update(kwargs)
+    return sweep(GRID, **options)
+
+
+def test_rows_follow_the_grid_and_are_reproducible():
+    rows = run(target_ci=10)
+    assert [(row['decks'], row['payout']) for row in rows] == [(1, 1.5), (1, 1.2), (6, 1.5), (6, 1.2)]
+    assert rows == run(target_ci=10)
+
+
+def test_cells_stop_at_min_hands_once_converged_or_at_max_hands():
+    assert all(row['hands'] == 1_000 and row['converged'] for row in run(target_ci=10))
+    assert all(row['hands'] == 3_000 and not row['converged'] for row in run(target_ci=1e-6))
+
+
+def test_a_cell_stops_after_the_batch_that_meets_the_target():
+    for row in run(target_ci=0.12, max_hands=10_000):
+        assert row['converged'] and row['ci95'] <= 0.12
+        assert 1_000 < row['hands'] < 10_000 and row['hands'] % 500 == 0
@@ -0,0 +1,40 @@
+"""Multi-seat tables: deal order, the shared shoe and the shared dealer hand"""
+import random
+
+from black_jack import BasicStrategy, BlackjackTable, CompiledStrategy, Rules, Seat, simulate_table
+
+
+def test_cards_go_round_the_table_in_casino_order():
+    rules = Rules()
+    table = BlackjackTable(rules, [Seat(BasicStrategy(rules), 10), Seat(BasicStrategy(rules), 25)], rng=random.Random(1))
+    draws = iter(['2', '3', '4', '5', '6', '7'])
+    table._draw_card = lambda visible=True: next(draws)
+    table.start_round()
+    # One card to each seat, the upcard, a second card to each seat, then the hole card
+    assert [seat.player_hands[0].cards for seat in table.seats] == [['2', '5'], ['3', '6']]
+    assert table.dealer_hand.cards == ['4', '7']
+    assert [seat.player_hands[0].bet for seat in table.seats] == [10, 25]
+
+
+def test_seats_share_one_shoe_and_one_dealer_hand():
+    rules = Rules()
+    table = BlackjackTable(rules, [Seat(CompiledStrategy(rules)), Seat(CompiledStrategy(rules))], rng=random.Random(2))
+    start = table.shoe_position
+    results = table.play_round()
+    cards_used = sum(len(hand.cards) for seat in table.seats for hand in seat.player_hands) + len(table.dealer_hand.cards)
+    assert table.shoe_position - start == cards_used
+    for seat, result in zip(table.seats, results):
+        assert result == sum(table._determine_winner(hand, table.dealer_hand) for hand in seat.player_hands)
+
+
+def test_simulated_seats_see_the_same_dealer_and_are_reproducible():
+    rules = Rules()
+
+    def run():
+        seats = [Seat(CompiledStrategy(rules)), Seat(BasicStrategy(rules))]
+        return simulate_table(rules, seats, 2_000, seed=4)
+
+    first, second = run()
+    assert first.total_hands == second.total_hands == 2_000
+    assert first.dealer_blackjacks == second.dealer_blackjacks
+    assert [stats.net for stats in run()] == [first.net, second.net]